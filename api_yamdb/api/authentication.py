@@ -0,0 +1,124 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (
+    AuthenticationFailed,
+    InvalidToken,
+    TokenError,
+)
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import aware_utcnow
+
+from reviews.models import User
+
+USER_STATE_FIELDS = ('username', 'role', 'is_superuser', 'is_active')
+
+
+class LRUCache:
+    """Потокобезопасный словарь ограниченного размера."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.data = OrderedDict()
+        self.lock = Lock()
+
+    def get(self, key):
+        with self.lock:
+            value = self.data.get(key)
+            if value is not None:
+                self.data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.data[key] = value
+            self.data.move_to_end(key)
+            while len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+
+    def pop(self, key):
+        with self.lock:
+            self.data.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+
+
+decoded_tokens = LRUCache(settings.JWT_AUTH_CACHE_SIZE)
+user_states = LRUCache(settings.JWT_AUTH_CACHE_SIZE)
+
+
+def forget_user(user_id):
+    """
+    Сбрасывает запомненные роль и активность пользователя,
+    следующий запрос с его токеном перечитает их из базы.
+    """
+    user_states.pop(user_id)
+
+
+def is_token_user(user):
+    """Пользователь собран без загрузки всех полей из базы."""
+    return getattr(user, 'is_token_user', False)
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    JWT-аутентификация без загрузки пользователя на каждый запрос.
+    Роль и активность пользователя читаются из базы одним запросом
+    и запоминаются в ограниченном LRU на JWT_AUTH_CACHE_TIMEOUT секунд,
+    поэтому смена роли, блокировка или удаление пользователя в другом
+    процессе действуют на его токены не позже чем через это время.
+    """
+
+    def get_validated_token(self, raw_token):
+        validated_token = decoded_tokens.get(raw_token)
+        if validated_token is None:
+            validated_token = super().get_validated_token(raw_token)
+            decoded_tokens.set(raw_token, validated_token)
+            return validated_token
+        try:
+            validated_token.check_exp(current_time=aware_utcnow())
+        except TokenError as error:
+            decoded_tokens.pop(raw_token)
+            raise InvalidToken(error.args[0])
+        return validated_token
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            return super().get_user(validated_token)
+        state = self.get_user_state(user_id)
+        if state is None:
+            raise AuthenticationFailed(
+                _('User not found'),
+                code='user_not_found',
+            )
+        if not state['is_active']:
+            raise AuthenticationFailed(
+                _('User is inactive'),
+                code='user_inactive',
+            )
+        user = User(**{api_settings.USER_ID_FIELD: user_id}, **state)
+        user.is_token_user = True
+        return user
+
+    def get_user_state(self, user_id):
+        cached = user_states.get(user_id)
+        if cached is not None and (
+            time.monotonic() - cached[0] < settings.JWT_AUTH_CACHE_TIMEOUT
+        ):
+            return cached[1]
+        loaded_at = time.monotonic()
+        state = (
+            User.objects.filter(**{api_settings.USER_ID_FIELD: user_id})
+            .values(*USER_STATE_FIELDS)
+            .first()
+        )
+        user_states.set(user_id, (loaded_at, state))
+        return state
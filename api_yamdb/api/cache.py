@@ -0,0 +1,77 @@
+import time
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import caches
+
+GENERATION_KEY = 'api:generation:{}'
+RESPONSE_KEY = 'api:response:{}'
+
+
+def get_cache():
+    return caches[settings.API_CACHE_ALIAS]
+
+
+def get_generations(namespaces):
+    """
+    Возвращает поколения пространств имён кэша, None - для тех,
+    у которых поколения ещё нет. Сами ключи здесь не создаются, чтобы
+    запросы к несуществующим объектам не засоряли кэш.
+    """
+    keys = [GENERATION_KEY.format(namespace) for namespace in namespaces]
+    generations = get_cache().get_many(keys)
+    return [generations.get(key) for key in keys]
+
+
+def start_generations(namespaces, generations):
+    """
+    Заводит недостающие поколения, начиная их с текущего времени, чтобы
+    после вытеснения ключа из кэша не вернуть старые ответы.
+    Возвращает None, если ключ успел завести параллельный сброс:
+    прочитанные до него данные сохранять нельзя.
+    """
+    cache = get_cache()
+    started = []
+    for namespace, generation in zip(namespaces, generations):
+        if generation is None:
+            generation = time.time_ns()
+            if not cache.add(
+                GENERATION_KEY.format(namespace),
+                generation,
+                timeout=settings.API_CACHE_GENERATION_TIMEOUT,
+            ):
+                return None
+        started.append(generation)
+    return started
+
+
+def invalidate(*namespaces):
+    """Сбрасывает все ответы, сохранённые в пространствах имён."""
+    cache = get_cache()
+    for namespace in namespaces:
+        key = GENERATION_KEY.format(namespace)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(
+                key,
+                time.time_ns(),
+                timeout=settings.API_CACHE_GENERATION_TIMEOUT,
+            )
+
+
+def response_key(request, namespaces, generations):
+    params = sorted(
+        (name, value)
+        for name, values in request.query_params.lists()
+        for value in values
+    )
+    key = '|'.join(
+        [
+            request.path,
+            repr(params),
+            *map(str, namespaces),
+            *map(str, generations),
+        ],
+    )
+    return RESPONSE_KEY.format(md5(key.encode()).hexdigest())
@@ -1,21 +1,81 @@
+from django.db import connection
+from django.db.models import F, Q
 from django_filters import filters
 from django_filters import rest_framework as filters
+from rest_framework.filters import OrderingFilter
 
-from reviews.models import Title
+from reviews import search
+from reviews.catalog import categories, genres
+from reviews.models import Title, TitleGenre
 
 
 class TitleFilter(filters.FilterSet):
-    category = filters.CharFilter(
-        field_name='category__slug',
-        lookup_expr='icontains',
-    )
-    genre = filters.CharFilter(
-        field_name='genre__slug',
-        lookup_expr='icontains',
-    )
+    category = filters.CharFilter(method='filter_category')
+    genre = filters.CharFilter(method='filter_genre')
     name = filters.CharFilter(field_name='name', lookup_expr='icontains')
     year = filters.NumberFilter(field_name='year', lookup_expr='icontains')
+    search = filters.CharFilter(method='filter_search')
 
     class Meta:
         model = Title
-        fields = ('name', 'category', 'genre', 'year')
+        fields = ('name', 'category', 'genre', 'year', 'search')
+
+    def filter_category(self, queryset, name, value):
+        # Слаги ищутся в справочнике, запрос обходится без JOIN категорий.
+        return queryset.filter(
+            category_id__in=categories.ids_with_slug_containing(value),
+        )
+
+    def filter_genre(self, queryset, name, value):
+        return queryset.filter(
+            id__in=TitleGenre.objects.filter(
+                genre_id__in=genres.ids_with_slug_containing(value),
+            ).values('title_id'),
+        )
+
+    def filter_search(self, queryset, name, value):
+        # В SQLite ищем по индексу FTS5 и отдаём search_rank для сортировки
+        # по релевантности, в других базах - по подстроке без ранжирования.
+        if not search.is_supported(connection):
+            return queryset.filter(
+                Q(name__icontains=value) | Q(description__icontains=value),
+            )
+        query = search.make_query(value)
+        if not query:
+            return queryset.none()
+        return queryset.filter(search__document__match=query).annotate(
+            search_rank=F('search__rank'),
+        )
+
+
+class TitleOrderingFilter(OrderingFilter):
+    """
+    Сортировка произведений по рейтингу, году или названию.
+    Рейтинг берётся из индексированного поля rating_avg,
+    id добавляется для однозначного порядка при пагинации по курсору.
+    Результаты поиска без явной сортировки идут по релевантности.
+    """
+
+    ordering_aliases = {'rating': 'rating_avg'}
+
+    def get_ordering(self, request, queryset, view):
+        if (
+            not self.get_ordering_param(request)
+            and 'search_rank' in queryset.query.annotations
+        ):
+            return ['search_rank', 'id']
+        ordering = [
+            self.get_field_name(field)
+            for field in super().get_ordering(request, queryset, view)
+        ]
+        if not {'id', '-id'} & set(ordering):
+            ordering.append('-id' if ordering[0].startswith('-') else 'id')
+        return ordering
+
+    def get_ordering_param(self, request):
+        return request.query_params.get(self.ordering_param)
+
+    def get_field_name(self, field):
+        prefix = '-' if field.startswith('-') else ''
+        name = field.lstrip('-')
+        return prefix + self.ordering_aliases.get(name, name)
@@ -0,0 +1,254 @@
+from hashlib import md5
+from http import HTTPStatus
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from api.cache import (
+    get_cache,
+    get_generations,
+    response_key,
+    start_generations,
+)
+from api.renderers import FastJSONRenderer
+from reviews.models import ModelVersion
+
+
+class ConditionalListMixin:
+    """
+    Добавляет ETag и Last-Modified к list.
+    Валидаторы строятся по счётчикам изменений моделей из version_models,
+    при совпадении ответ 304 отдаётся без сериализации данных.
+    """
+
+    version_models = ()
+
+    def get_validators(self, request):
+        names = [model._meta.label_lower for model in self.version_models]
+        versions = dict.fromkeys(names, (0, None))
+        versions.update(
+            (name, (version, modified))
+            for name, version, modified in ModelVersion.objects.filter(
+                name__in=names,
+            ).values_list('name', 'version', 'modified')
+        )
+        key = '|'.join(
+            [
+                request.get_full_path(),
+                request.accepted_renderer.media_type,
+                *(f'{name}:{versions[name][0]}' for name in names),
+            ],
+        )
+        etag = quote_etag(md5(key.encode()).hexdigest())
+        timestamps = [
+            modified.timestamp()
+            for _, modified in versions.values()
+            if modified is not None
+        ]
+        return etag, int(max(timestamps)) if timestamps else None
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        etag, last_modified = self.get_validators(request)
+        response = get_conditional_response(
+            request,
+            etag=etag,
+            last_modified=last_modified,
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in (HTTPStatus.OK, HTTPStatus.NOT_MODIFIED):
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().list,
+            request,
+            *args,
+            **kwargs,
+        )
+
+
+class ConditionalGetMixin(ConditionalListMixin):
+    """Добавляет ETag и Last-Modified к list и retrieve."""
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve,
+            request,
+            *args,
+            **kwargs,
+        )
+
+
+class CachedListMixin:
+    """
+    Кэширует ответы list для анонимных пользователей.
+    Ключ строится по пути, параметрам запроса и поколениям
+    пространств имён из get_cache_namespaces, их сбрасывают сигналы.
+    """
+
+    def get_cache_namespaces(self):
+        raise NotImplementedError
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return handler(request, *args, **kwargs)
+        cache = get_cache()
+        namespaces = self.get_cache_namespaces()
+        generations = get_generations(namespaces)
+        if None not in generations:
+            data = cache.get(response_key(request, namespaces, generations))
+            if data is not None:
+                return Response(data)
+        response = handler(request, *args, **kwargs)
+        if response.status_code != HTTPStatus.OK:
+            return response
+        # Поколения заводятся только после успешного ответа: запрос
+        # к несуществующему объекту не оставляет в кэше ключей.
+        if None in generations:
+            generations = start_generations(namespaces, generations)
+        if generations is not None:
+            cache.set(
+                response_key(request, namespaces, generations),
+                response.data,
+                settings.API_CACHE_TIMEOUT,
+            )
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+
+class CachedGetMixin(CachedListMixin):
+    """Кэширует ответы list и retrieve для анонимных пользователей."""
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve,
+            request,
+            *args,
+            **kwargs,
+        )
+
+
+class ExportMixin:
+    """
+    Добавляет export: весь список одним ответом в NDJSON, по объекту
+    в строке. Объекты читаются пачками по первичному ключу, поэтому
+    память не растёт вместе с размером выгрузки.
+    """
+
+    export_renderer = FastJSONRenderer()
+
+    def get_export_queryset(self):
+        return self.filter_queryset(self.get_queryset()).order_by('pk')
+
+    @action(
+        detail=False,
+        methods=['GET'],
+        permission_classes=(IsAuthenticated,),
+        pagination_class=None,
+    )
+    def export(self, request, *args, **kwargs):
+        return StreamingHttpResponse(
+            self.export_lines(self.get_export_queryset()),
+            content_type='application/x-ndjson',
+        )
+
+    def export_lines(self, queryset):
+        last_pk = None
+        while True:
+            chunk = queryset if last_pk is None else queryset.filter(
+                pk__gt=last_pk,
+            )
+            objs = list(chunk[:settings.EXPORT_CHUNK_SIZE])
+            if not objs:
+                return
+            for data in self.get_serializer(objs, many=True).data:
+                yield self.export_renderer.render(data) + b'\n'
+            last_pk = objs[-1].pk
+
+
+class SparseFieldsMixin:
+    """
+    Поддерживает параметр fields (?fields=id,name) при чтении:
+    сериализатор выводит только перечисленные поля, а запрос к базе
+    загружает только нужные для них столбцы и связи.
+    """
+
+    # Поле сериализатора -> поля модели для only(),
+    # связи из путей с __ загружаются через select_related.
+    sparse_fields = {}
+    # Поле сериализатора -> связи для prefetch_related.
+    sparse_prefetch = {}
+    sparse_actions = ('list', 'retrieve', 'export')
+
+    def get_sparse_fields(self):
+        request = getattr(self, 'request', None)
+        if request is None or self.action not in self.sparse_actions:
+            return None
+        value = request.query_params.get('fields')
+        if not value:
+            return None
+        fields = [name.strip() for name in value.split(',') if name.strip()]
+        unknown = sorted(set(fields) - set(self.sparse_fields))
+        if unknown:
+            raise ValidationError(
+                {'fields': [f'Неизвестные поля: {", ".join(unknown)}.']},
+            )
+        return fields
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        fields = self.get_sparse_fields()
+        if fields is None:
+            return queryset
+        only = {
+            field.lstrip('-')
+            for field in self.get_sparse_ordering(queryset)
+            if field.lstrip('-') not in queryset.query.annotations
+        }
+        related = set()
+        prefetch = set()
+        for name in fields:
+            for path in self.sparse_fields[name]:
+                only.add(path)
+                parts = path.split('__')
+                for depth in range(1, len(parts)):
+                    related.add('__'.join(parts[:depth]))
+                    only.add('__'.join(parts[:depth]))
+            prefetch.update(self.sparse_prefetch.get(name, ()))
+        queryset = queryset.select_related(None).prefetch_related(None)
+        if related:
+            queryset = queryset.select_related(*related)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        return queryset.only(*only)
+
+    def get_sparse_ordering(self, queryset):
+        """
+        Поля сортировки из параметра ordering и пагинатора: курсор
+        читает их у каждого объекта, поэтому они не должны откладываться.
+        """
+        ordering = list(getattr(self.paginator, 'ordering', None) or ())
+        for backend in self.filter_backends:
+            if hasattr(backend, 'get_ordering'):
+                ordering.extend(
+                    backend().get_ordering(self.request, queryset, self) or (),
+                )
+        return ordering
+
+    def get_serializer(self, *args, **kwargs):
+        fields = self.get_sparse_fields()
+        if fields is not None:
+            kwargs['fields'] = fields
+        return super().get_serializer(*args, **kwargs)
@@ -0,0 +1,158 @@
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (
+    BasePagination,
+    CursorPagination,
+    PageNumberPagination,
+)
+
+
+def reverse_ordering(ordering):
+    return tuple(
+        field[1:] if field.startswith('-') else f'-{field}'
+        for field in ordering
+    )
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    Курсор хранит значения всех полей сортировки, а не только первого,
+    как CursorPagination. Следующая страница выбирается условием
+    «после (значение, id)», поэтому при множестве одинаковых значений
+    первого поля запрос идёт по индексу без растущего OFFSET.
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        offset, reverse, position = self.cursor or (0, False, None)
+
+        ordering = self.ordering
+        if reverse:
+            ordering = reverse_ordering(ordering)
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = self.filter_after(queryset, ordering, position)
+
+        # Лишняя запись показывает, есть ли что-то после страницы.
+        results = list(queryset[offset:offset + self.page_size + 1])
+        self.page = results[:self.page_size]
+        following_position = None
+        if len(results) > len(self.page):
+            following_position = self._get_position_from_instance(
+                results[-1], self.ordering,
+            )
+
+        has_before = position is not None or offset > 0
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.next_position = has_before, position
+            self.has_previous = following_position is not None
+            self.previous_position = following_position
+        else:
+            self.has_next = following_position is not None
+            self.next_position = following_position
+            self.has_previous, self.previous_position = has_before, position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def filter_after(self, queryset, ordering, position):
+        """
+        Оставляет записи строго после position в порядке ordering:
+        (a > x) or (a = x and b > y) и так далее по всем полям.
+        """
+        try:
+            values = json.loads(position)
+            if not isinstance(values, list) or len(values) != len(ordering):
+                raise ValueError
+            after = None
+            for field, value in reversed(list(zip(ordering, values))):
+                name = field.lstrip('-')
+                lookup = 'lt' if field.startswith('-') else 'gt'
+                condition = Q(**{f'{name}__{lookup}': value})
+                if after is not None:
+                    condition |= Q(**{name: value}) & after
+                after = condition
+            first = ordering[0]
+            bound = 'lte' if first.startswith('-') else 'gte'
+            # Граница по первому полю отдельным условием даёт базе
+            # диапазонное чтение индекса вместо разбора OR.
+            return queryset.filter(
+                Q(**{f'{first.lstrip("-")}__{bound}': values[0]}) & after,
+            )
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def _get_position_from_instance(self, instance, ordering):
+        names = [field.lstrip('-') for field in ordering]
+        if isinstance(instance, dict):
+            values = [instance[name] for name in names]
+        else:
+            values = [getattr(instance, name) for name in names]
+        # str, а не DjangoJSONEncoder: тот обрезает время до миллисекунд.
+        return json.dumps(values, default=str)
+
+
+class CursorOrPageNumberPagination(BasePagination):
+    """
+    Пагинация по курсору, если в запросе есть параметр cursor,
+    иначе постраничная пагинация для старых клиентов.
+    Первая страница по курсору запрашивается с пустым ?cursor=.
+    """
+
+    ordering = None
+
+    def __init__(self):
+        self.page_number_paginator = PageNumberPagination()
+        self.cursor_paginator = KeysetCursorPagination()
+        self.cursor_paginator.ordering = self.ordering
+        self.paginator = self.page_number_paginator
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.cursor_paginator.cursor_query_param in request.query_params:
+            self.paginator = self.cursor_paginator
+        else:
+            self.paginator = self.page_number_paginator
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return self.page_number_paginator.get_paginated_response_schema(
+            schema,
+        )
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            *self.page_number_paginator.get_schema_operation_parameters(view),
+            *self.cursor_paginator.get_schema_operation_parameters(view),
+        ]
+
+
+class ReviewPagination(CursorOrPageNumberPagination):
+    """Пагинация отзывов, порядок совпадает с Review.Meta.ordering."""
+
+    ordering = ('-pub_date', '-id')
+
+
+class CommentPagination(CursorOrPageNumberPagination):
+    """Пагинация комментариев, порядок совпадает с Comment.Meta.ordering."""
+
+    ordering = ('pub_date', 'id')
+
+
+class TitlePagination(CursorOrPageNumberPagination):
+    """Пагинация произведений, порядок задаёт TitleOrderingFilter."""
+
+    ordering = ('id',)
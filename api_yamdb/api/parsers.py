@@ -0,0 +1,30 @@
+import codecs
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+
+from api.renderers import FastJSONRenderer, orjson
+
+
+class FastJSONParser(JSONParser):
+    """
+    Парсер JSON на orjson.
+    Без orjson или для тел не в UTF-8 работает как JSONParser.
+    """
+
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if (
+            orjson is None
+            or not self.strict
+            or codecs.lookup(encoding).name != 'utf-8'
+        ):
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
@@ -0,0 +1,50 @@
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+ORJSON_OPTIONS = (
+    orjson.OPT_NON_STR_KEYS
+    | orjson.OPT_PASSTHROUGH_DATACLASS
+    | orjson.OPT_PASSTHROUGH_DATETIME
+    if orjson is not None
+    else None
+)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    Рендерер JSON на orjson. Даты и прочие нестандартные типы по-прежнему
+    приводит encoder_class, и вывод совпадает с JSONRenderer, кроме
+    чисел с плавающей точкой в экспоненциальной записи: 1e16 вместо 1e+16
+    и 1e-7 вместо 1e-07, при разборе значения те же. NaN и бесконечности
+    orjson выводит как null.
+    Без orjson и для форматированного вывода работает как JSONRenderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {})
+            is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(
+                data,
+                default=self.encoder_class().default,
+                option=ORJSON_OPTIONS,
+            )
+        except orjson.JSONEncodeError:
+            # Например, целые за пределами 64 бит.
+            return super().render(data, accepted_media_type, renderer_context)
+        # Как и JSONRenderer, экранируем символы, недопустимые в JavaScript.
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace(
+            '\u2029'.encode(),
+            b'\\u2029',
+        )
@@ -2,12 +2,35 @@ from datetime import datetime
 
 from django.conf import settings
 from django.core.exceptions import ValidationError
+from django.db.models import Q
 from django.shortcuts import get_object_or_404
+from django.utils.encoding import smart_str
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 
+from reviews.catalog import categories, genres
 from reviews.models import Category, Comment, Genre, Review, Title, User
 
 
+class CatalogSlugRelatedField(serializers.SlugRelatedField):
+    """Ищет объект по слагу в справочнике процесса, а не в базе."""
+
+    def __init__(self, catalog, **kwargs):
+        self.catalog = catalog
+        kwargs.setdefault('queryset', catalog.model.objects)
+        super().__init__(slug_field='slug', **kwargs)
+
+    def to_internal_value(self, data):
+        obj = self.catalog.get_by_slug(smart_str(data))
+        if obj is None:
+            self.fail(
+                'does_not_exist',
+                slug_name=self.slug_field,
+                value=smart_str(data),
+            )
+        return obj
+
+
 class GenreSerializer(serializers.ModelSerializer):
     """Сериализатор для жанров."""
 
@@ -30,19 +53,38 @@ class CategorySerializer(serializers.ModelSerializer):
         fields = ('name', 'slug')
 
 
-class ReadTitleSerializer(serializers.ModelSerializer):
+class SparseFieldsSerializerMixin:
+    """Оставляет в выводе только поля из аргумента fields."""
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class ReadTitleSerializer(
+    SparseFieldsSerializerMixin,
+    serializers.ModelSerializer,
+):
     """Сериализатор только для чтения произведений."""
 
     description = serializers.CharField(required=False)
     name = serializers.CharField(max_length=settings.MAX_LENGTH)
-    genre = GenreSerializer(many=True)
-    category = CategorySerializer()
-    rating = serializers.IntegerField()
+    genre = serializers.SerializerMethodField()
+    category = serializers.SerializerMethodField()
+    rating = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Title
         fields = (
-            '__all__'
+            'id',
+            'name',
+            'year',
+            'rating',
+            'description',
+            'genre',
+            'category',
         )
         read_only_fields = (
             'id',
@@ -54,50 +96,84 @@ class ReadTitleSerializer(serializers.ModelSerializer):
             'category',
         )
 
+    @extend_schema_field(GenreSerializer(many=True))
+    def get_genre(self, title):
+        # Жанры берутся из справочника по предзагруженным связям.
+        genre_ids = sorted(
+            link.genre_id
+            for link in title.titlegenre_set.all()
+            if link.genre_id is not None
+        )
+        return GenreSerializer(genres.get_many(genre_ids), many=True).data
+
+    @extend_schema_field(CategorySerializer(allow_null=True))
+    def get_category(self, title):
+        if title.category_id is None:
+            return None
+        return CategorySerializer(categories.get_by_id(title.category_id)).data
+
 
 class TitleSerializer(serializers.ModelSerializer):
     """Сериализатор для произведений."""
 
     description = serializers.CharField(required=False)
     name = serializers.CharField(max_length=settings.MAX_LENGTH)
-    genre = serializers.SlugRelatedField(
-        slug_field='slug',
-        queryset=Genre.objects,
-        many=True,
-    )
-    category = serializers.SlugRelatedField(
-        slug_field='slug',
-        queryset=Category.objects,
-    )
+    genre = CatalogSlugRelatedField(genres, many=True)
+    category = CatalogSlugRelatedField(categories)
 
     class Meta:
         model = Title
-        fields = '__all__'
+        fields = (
+            'id',
+            'name',
+            'year',
+            'description',
+            'genre',
+            'category',
+        )
 
-    def validate_genre(self, genres):
-        if not self.partial:
-            for genre in genres:
-                if genre not in Genre.objects.all():
-                    raise serializers.ValidationError(
-                        'Такого жанра нет в списке',
-                    )
-            return genres
+    @property
+    def check_related(self):
+        """
+        Проверять ли по базе, что жанры и категория не удалены.
+        При массовой записи это делает вьюсет одним запросом на весь список.
+        """
+        return not self.partial and not self.context.get('bulk')
+
+    def validate_genre(self, value):
+        if self.check_related:
+            # Слаги уже найдены в справочнике, одним запросом
+            # проверяем, что жанры не удалены из базы.
+            genre_ids = {genre.id for genre in value}
+            existing_ids = set(
+                Genre.objects.filter(id__in=genre_ids).values_list(
+                    'id',
+                    flat=True,
+                ),
+            )
+            if genre_ids - existing_ids:
+                genres.invalidate()
+                raise serializers.ValidationError(
+                    'Такого жанра нет в списке',
+                )
+            return value
 
-        return genres
+        return value
 
-    def validate_category(self, category):
-        if not self.partial:
-            if category not in Category.objects.all():
+    def validate_category(self, value):
+        if self.check_related:
+            if not Category.objects.filter(id=value.id).exists():
+                categories.invalidate()
                 raise serializers.ValidationError(
                     'Такой категории нет в списке',
                 )
-            return category
+            return value
 
-        return category
+        return value
 
     def validate_year(self, data):
         if self.partial:
-            if data.get('year') > datetime.today().year:
+            if data > datetime.today().year:
                 raise serializers.ValidationError(
                     'Это произведение ещё не вышло',
                 )
@@ -107,34 +183,52 @@ class TitleSerializer(serializers.ModelSerializer):
 
 
 class SignUpSerializer(serializers.ModelSerializer):
-    """Сериализатор для регистрации пользователя."""
+    """
+    Сериализатор для регистрации пользователя.
+    Уникальность username и email проверяет база при вставке.
+    """
 
     class Meta:
         model = User
         fields = ('username', 'email')
+        extra_kwargs = {
+            'username': {'validators': []},
+            'email': {'validators': []},
+        }
 
     def validate_username(self, value):
         if value == 'me':
             raise serializers.ValidationError(
                 'Придумай другое имя. Кто себя называет me?',
             )
-        elif User.objects.filter(username=value):
-            raise serializers.ValidationError(
-                'Пользователь с таким username уже существует.',
-            )
         return value
 
-    def validate_email(self, value):
-        if User.objects.filter(email=value):
-            raise serializers.ValidationError(
-                'Пользователь с таким email уже существует.',
-            )
-        return value
+    def get_unique_errors(self):
+        """Ошибки по полям, занятым другими пользователями."""
+        username = self.validated_data['username']
+        email = self.validated_data['email']
+        errors = {}
+        for user in User.objects.filter(
+            Q(username=username) | Q(email=email),
+        ).only('username', 'email'):
+            if user.username == username:
+                errors['username'] = [
+                    'Пользователь с таким username уже существует.',
+                ]
+            if user.email == email:
+                errors['email'] = [
+                    'Пользователь с таким email уже существует.',
+                ]
+        return errors
 
 
 class TokenSerializer(serializers.ModelSerializer):
     """Сериализатор для получения токена JWT."""
 
+    # Поле объявлено явно, иначе проверка уникальности
+    # отклоняет username существующего пользователя.
+    username = serializers.CharField(max_length=settings.MAX_LENGTH_USERNAME)
+
     class Meta:
         model = User
         fields = ('username', 'confirmation_code')
@@ -162,7 +256,10 @@ class UserSerializer(serializers.ModelSerializer):
         )
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(
+    SparseFieldsSerializerMixin,
+    serializers.ModelSerializer,
+):
     """Сериализатор для модели Review."""
 
     title = serializers.SlugRelatedField(slug_field='name', read_only=True)
@@ -199,7 +296,10 @@ class ReviewSerializer(serializers.ModelSerializer):
         model = Review
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(
+    SparseFieldsSerializerMixin,
+    serializers.ModelSerializer,
+):
     review = serializers.SlugRelatedField(slug_field='text', read_only=True)
     author = serializers.SlugRelatedField(
         slug_field='username',
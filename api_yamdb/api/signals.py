@@ -0,0 +1,121 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from api.authentication import forget_user
+from api.cache import invalidate
+from reviews.models import (
+    Category,
+    Comment,
+    Genre,
+    Review,
+    Title,
+    TitleGenre,
+    User,
+)
+from reviews.signals import bulk_imported
+
+
+def invalidate_on_commit(*namespaces):
+    """Сбрасывает кэш после фиксации транзакции с изменениями."""
+    transaction.on_commit(partial(invalidate, *namespaces))
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+def invalidate_title(sender, instance, **kwargs):
+    invalidate_on_commit(
+        'titles',
+        f'title:{instance.id}',
+        f'reviews:{instance.id}',
+    )
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def invalidate_title_genres(sender, instance, action, reverse, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse:
+        invalidate_on_commit('titles', 'title-details')
+    else:
+        invalidate_on_commit('titles', f'title:{instance.id}')
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+def invalidate_genre(sender, **kwargs):
+    invalidate_on_commit('genres', 'titles', 'title-details')
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category(sender, **kwargs):
+    invalidate_on_commit('categories', 'titles', 'title-details')
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_review(sender, instance, **kwargs):
+    invalidate_on_commit(
+        f'reviews:{instance.title_id}',
+        'titles',
+        f'title:{instance.title_id}',
+        f'comments:{instance.id}',
+    )
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment(sender, instance, **kwargs):
+    invalidate_on_commit(f'comments:{instance.review_id}')
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_user_state(sender, instance, **kwargs):
+    # Роль и активность перечитаются из базы и в этом процессе,
+    # и в других - по истечении JWT_AUTH_CACHE_TIMEOUT.
+    transaction.on_commit(partial(forget_user, instance.pk))
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_on_save(sender, created, update_fields, **kwargs):
+    if not created and (update_fields is None or 'username' in update_fields):
+        invalidate_on_commit('authors')
+
+
+@receiver(post_delete, sender=User)
+def invalidate_author_on_delete(sender, **kwargs):
+    invalidate_on_commit('authors')
+
+
+@receiver(bulk_imported)
+def invalidate_on_bulk_import(sender, objs, **kwargs):
+    if sender in (Title, TitleGenre):
+        invalidate_on_commit(
+            'titles',
+            'title-details',
+            *{f'reviews:{obj.id}' for obj in objs if sender is Title},
+        )
+    elif sender is Genre:
+        invalidate_on_commit('genres', 'titles', 'title-details')
+    elif sender is Category:
+        invalidate_on_commit('categories', 'titles', 'title-details')
+    elif sender is Review:
+        title_ids = {obj.title_id for obj in objs}
+        invalidate_on_commit(
+            'titles',
+            *(f'reviews:{title_id}' for title_id in title_ids),
+            *(f'title:{title_id}' for title_id in title_ids),
+            *(f'comments:{obj.id}' for obj in objs),
+        )
+    elif sender is Comment:
+        invalidate_on_commit(
+            *{f'comments:{obj.review_id}' for obj in objs},
+        )
+    elif sender is User:
+        invalidate_on_commit('authors')
+        for obj in objs:
+            transaction.on_commit(partial(forget_user, obj.pk))
@@ -8,6 +8,7 @@ from api.views import (
     ReviewViewSet,
     TitleViewSet,
     UserViewSet,
+    autocomplete,
     get_token,
     signup,
 )
@@ -42,6 +43,7 @@ user_url = [
 ]
 
 urlpatterns = [
+    path('v1/autocomplete/', autocomplete),
     path('v1/', include(router_v1.urls)),
     path('v1/auth/', include(user_url)),
 ]
@@ -1,11 +1,11 @@
 from django.conf import settings
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
-from django.db.models import Avg
+from django.db import IntegrityError, connection, transaction
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, request, status, viewsets
 from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.exceptions import ValidationError
 from rest_framework.filters import SearchFilter
 from rest_framework.mixins import (
     CreateModelMixin,
@@ -16,7 +16,21 @@ from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import AccessToken
 
-from api.filters import TitleFilter
+from api.authentication import is_token_user
+from api.filters import TitleFilter, TitleOrderingFilter
+from api.mixins import (
+    CachedGetMixin,
+    CachedListMixin,
+    ConditionalGetMixin,
+    ConditionalListMixin,
+    ExportMixin,
+    SparseFieldsMixin,
+)
+from api.pagination import (
+    CommentPagination,
+    ReviewPagination,
+    TitlePagination,
+)
 from api.permissions import (
     IsAdminModeratorAuthorOrReadOnly,
     IsRoleAdmin,
@@ -33,27 +47,328 @@ from api.serializers import (
     TokenSerializer,
     UserSerializer,
 )
-from reviews.models import Category, Genre, Review, Title, User
+from reviews.autocomplete import category_names, genre_names, title_names
+from reviews.catalog import categories, genres
+from reviews.models import (
+    Category,
+    Comment,
+    Genre,
+    OutgoingEmail,
+    Review,
+    Title,
+    TitleGenre,
+    User,
+)
+from reviews.signals import bulk_imported
 
 
-class TitleViewSet(viewsets.ModelViewSet):
+class TitleViewSet(
+    ConditionalGetMixin,
+    CachedGetMixin,
+    ExportMixin,
+    SparseFieldsMixin,
+    viewsets.ModelViewSet,
+):
     """Вьюсет для обработки произведений."""
 
-    queryset = Title.objects.annotate(rating=Avg('reviews__score')).order_by(
-        'id',
-    )
+    queryset = Title.objects.prefetch_related('titlegenre_set')
     serializer_class = TitleSerializer
     permission_classes = [IsRoleAdmin | ReadOnly]
+    pagination_class = TitlePagination
     filterset_class = TitleFilter
-    filter_backends = (DjangoFilterBackend,)
+    filter_backends = (DjangoFilterBackend, TitleOrderingFilter)
+    ordering_fields = ('rating', 'year', 'name')
+    ordering = ('id',)
+    version_models = (Title, Genre, Category, Review)
+    sparse_fields = {
+        'id': ('id',),
+        'name': ('name',),
+        'year': ('year',),
+        'rating': ('rating_sum', 'rating_count'),
+        'description': ('description',),
+        'genre': (),
+        'category': ('category',),
+    }
+    sparse_prefetch = {'genre': ('titlegenre_set',)}
+    sparse_actions = ('list', 'retrieve', 'export', 'batch')
 
     def get_serializer_class(self):
-        if self.action in ('list', 'retrieve'):
+        if self.action in ('list', 'retrieve', 'export', 'batch'):
             return ReadTitleSerializer
         return TitleSerializer
 
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['bulk'] = self.action == 'bulk'
+        return context
+
+    def get_cache_namespaces(self):
+        if self.action == 'retrieve':
+            return ('title-details', f'title:{self.kwargs.get("pk")}')
+        return ('titles',)
+
+    @action(methods=['GET'], detail=True, url_path='scores')
+    def scores(self, request: request.Request, pk=None) -> Response:
+        """
+        Доступ к эндпойнту titles/{id}/scores/.
+        Количество отзывов с каждой оценкой из сохранённой гистограммы.
+        """
+        title = get_object_or_404(Title.objects.only('id'), pk=pk)
+        counts = dict(title.scores.values_list('score', 'count'))
+        return Response(
+            [
+                {'score': score, 'count': counts.get(score, 0)}
+                for score in range(settings.MIN_SCORE, settings.MAX_SCORE + 1)
+            ],
+            status=status.HTTP_200_OK,
+        )
+
+    @action(methods=['GET'], detail=False, url_path='batch')
+    def batch(self, request: request.Request) -> Response:
+        """
+        Доступ к эндпойнту titles/batch/?ids=1,2,3.
+        Произведения из списка одним ответом, в порядке id в запросе,
+        не найденные пропускаются.
+        """
+        ids = self.get_batch_ids()
+        titles = {
+            title.id: title
+            for title in self.filter_queryset(self.get_queryset()).filter(
+                id__in=ids,
+            )
+        }
+        serializer = self.get_serializer(
+            [titles[title_id] for title_id in ids if title_id in titles],
+            many=True,
+        )
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    def get_batch_ids(self):
+        value = self.request.query_params.get('ids', '')
+        try:
+            ids = list(
+                dict.fromkeys(
+                    int(title_id) for title_id in value.split(',') if title_id
+                ),
+            )
+        except ValueError:
+            raise ValidationError({'ids': ['Укажите id через запятую.']})
+        if not ids:
+            raise ValidationError({'ids': ['Укажите id через запятую.']})
+        if len(ids) > settings.TITLES_BATCH_SIZE:
+            raise ValidationError(
+                {
+                    'ids': [
+                        'Можно запросить не больше '
+                        f'{settings.TITLES_BATCH_SIZE} произведений.',
+                    ],
+                },
+            )
+        return ids
+
+    @action(methods=['POST', 'PATCH'], detail=False, url_path='bulk')
+    def bulk(self, request: request.Request) -> Response:
+        """
+        Доступ к эндпойнту titles/bulk/ для администратора.
+        POST создаёт произведения из списка, PATCH частично обновляет
+        произведения по id. Список записывается в одной транзакции целиком
+        или не записывается вовсе, ошибки возвращаются по каждому элементу.
+        """
+        partial = request.method == 'PATCH'
+        serializers = self.validate_bulk(self.get_bulk_items(), partial)
+        with transaction.atomic():
+            if partial:
+                titles = self.bulk_update_titles(serializers)
+            else:
+                titles = self.bulk_create_titles(serializers)
+        saved = self.get_queryset().in_bulk([title.id for title in titles])
+        serializer = ReadTitleSerializer(
+            [saved[title.id] for title in titles],
+            many=True,
+        )
+        return Response(
+            serializer.data,
+            status=status.HTTP_200_OK if partial else status.HTTP_201_CREATED,
+        )
+
+    def get_bulk_items(self):
+        items = self.request.data
+        if not isinstance(items, list) or not items:
+            raise ValidationError(
+                {'non_field_errors': ['Ожидается список произведений.']},
+            )
+        if len(items) > settings.TITLES_BULK_SIZE:
+            raise ValidationError(
+                {
+                    'non_field_errors': [
+                        'Можно записать не больше '
+                        f'{settings.TITLES_BULK_SIZE} произведений.',
+                    ],
+                },
+            )
+        return items
+
+    def validate_bulk(self, items, partial):
+        """
+        Проверяет элементы списка. Слаги ищутся в справочнике, наличие
+        жанров и категорий в базе проверяется одним запросом на весь список,
+        для обновления произведения загружаются одним запросом.
+        """
+        instances = self.get_bulk_instances(items) if partial else {}
+        serializers = []
+        errors = []
+        seen_ids = set()
+        for item in items:
+            serializer, item_errors = self.validate_bulk_item(
+                item,
+                instances,
+                seen_ids,
+                partial,
+            )
+            serializers.append(serializer)
+            errors.append(item_errors)
+        self.validate_bulk_related(serializers, errors)
+        if any(errors):
+            raise ValidationError(errors)
+        return serializers
+
+    def get_bulk_instances(self, items):
+        return Title.objects.in_bulk(
+            {
+                item.get('id')
+                for item in items
+                if isinstance(item, dict) and isinstance(item.get('id'), int)
+            },
+        )
+
+    def validate_bulk_item(self, item, instances, seen_ids, partial):
+        """Сериализатор и ошибки одного элемента без запросов к базе."""
+        instance = None
+        if partial:
+            title_id = item.get('id') if isinstance(item, dict) else None
+            instance = instances.get(title_id)
+            if instance is None:
+                return None, {'id': ['Произведение не найдено.']}
+            if title_id in seen_ids:
+                return None, {'id': ['Произведение уже есть в списке.']}
+            seen_ids.add(title_id)
+        serializer = self.get_serializer(instance, data=item, partial=partial)
+        serializer.is_valid()
+        return serializer, dict(serializer.errors)
+
+    def validate_bulk_related(self, serializers, errors):
+        """Дописывает ошибки элементам с удалёнными жанрами и категориями."""
+        valid = [
+            (serializer.validated_data, item_errors)
+            for serializer, item_errors in zip(serializers, errors)
+            if serializer is not None and not item_errors
+        ]
+        genre_ids = {
+            genre.id for data, _ in valid for genre in data.get('genre', ())
+        }
+        category_ids = {
+            data['category'].id for data, _ in valid if data.get('category')
+        }
+        missing_genres = genre_ids - set(
+            Genre.objects.filter(id__in=genre_ids).values_list(
+                'id',
+                flat=True,
+            ),
+        )
+        missing_categories = category_ids - set(
+            Category.objects.filter(id__in=category_ids).values_list(
+                'id',
+                flat=True,
+            ),
+        )
+        if missing_genres:
+            genres.invalidate()
+        if missing_categories:
+            categories.invalidate()
+        for data, item_errors in valid:
+            if {genre.id for genre in data.get('genre', ())} & missing_genres:
+                item_errors['genre'] = ['Такого жанра нет в списке']
+            category = data.get('category')
+            if category and category.id in missing_categories:
+                item_errors['category'] = ['Такой категории нет в списке']
+
+    def bulk_create_titles(self, serializers):
+        titles = [
+            Title(
+                **{
+                    attr: value
+                    for attr, value in serializer.validated_data.items()
+                    if attr != 'genre'
+                },
+            )
+            for serializer in serializers
+        ]
+        self.insert_titles(titles)
+        self.bulk_set_genres(
+            [
+                (title, serializer.validated_data.get('genre', ()))
+                for title, serializer in zip(titles, serializers)
+            ],
+        )
+        bulk_imported.send(sender=Title, objs=titles)
+        return titles
+
+    def insert_titles(self, titles):
+        """Записывает новые произведения и проставляет им id."""
+        if connection.features.can_return_rows_from_bulk_insert:
+            Title.objects.bulk_create(titles)
+        elif connection.vendor == 'sqlite':
+            # SQLite в Django 3.2 не возвращает id из bulk_create.
+            # Писать в базу может только одна транзакция, поэтому
+            # наши строки получили последние id подряд.
+            Title.objects.bulk_create(titles)
+            ids = Title.objects.order_by('-id').values_list('id', flat=True)
+            for title, title_id in zip(titles, ids[:len(titles)][::-1]):
+                title.pk = title_id
+        else:
+            # Без RETURNING и без единственного писателя id новых строк
+            # однозначно известны только при вставке по одной.
+            for title in titles:
+                title.save()
+
+    def bulk_update_titles(self, serializers):
+        titles = []
+        fields = set()
+        title_genres = []
+        for serializer in serializers:
+            title = serializer.instance
+            for attr, value in serializer.validated_data.items():
+                if attr == 'genre':
+                    title_genres.append((title, value))
+                else:
+                    setattr(title, attr, value)
+                    fields.add(attr)
+            titles.append(title)
+        if fields:
+            Title.objects.bulk_update(titles, fields)
+        if title_genres:
+            TitleGenre.objects.filter(
+                title__in=[title for title, _ in title_genres],
+            ).delete()
+            self.bulk_set_genres(title_genres)
+        bulk_imported.send(sender=Title, objs=titles)
+        return titles
+
+    def bulk_set_genres(self, title_genres):
+        """Записывает связи произведений с жанрами одной вставкой."""
+        links = [
+            TitleGenre(title=title, genre=genre)
+            for title, title_genre in title_genres
+            for genre in dict.fromkeys(title_genre)
+        ]
+        TitleGenre.objects.bulk_create(links)
+        if links:
+            bulk_imported.send(sender=TitleGenre, objs=links)
+
 
 class GetCreateDestroyViewSet(
+    ConditionalListMixin,
+    CachedListMixin,
     CreateModelMixin,
     ListModelMixin,
     DestroyModelMixin,
@@ -70,22 +385,30 @@ class GenreViewSet(GetCreateDestroyViewSet):
 
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
+    version_models = (Genre,)
     permission_classes = [IsRoleAdmin | ReadOnly]
     lookup_field = 'slug'
     filter_backends = (filters.SearchFilter,)
     search_fields = ('name',)
 
+    def get_cache_namespaces(self):
+        return ('genres',)
+
 
 class CategoryViewSet(GetCreateDestroyViewSet):
     """Вьюсет для обработки категорий."""
 
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    version_models = (Category,)
     permission_classes = [IsRoleAdmin | ReadOnly]
     filter_backends = (filters.SearchFilter,)
     lookup_field = 'slug'
     search_fields = ('name',)
 
+    def get_cache_namespaces(self):
+        return ('categories',)
+
 
 class UserViewSet(viewsets.ModelViewSet):
     """
@@ -113,18 +436,23 @@ class UserViewSet(viewsets.ModelViewSet):
         Информация о пользователе и возмодность редактирования
             своей информации.
         """
+        user = request.user
+        if is_token_user(user):
+            # В токене только роль, остальные поля читаем из базы.
+            user = get_object_or_404(User, pk=user.pk)
+
         if request.method == 'GET':
-            serializer = UserSerializer(request.user)
+            serializer = UserSerializer(user)
             return Response(serializer.data, status=status.HTTP_200_OK)
 
         if request.method == 'PATCH':
             serializer = UserSerializer(
-                request.user,
+                user,
                 data=request.data,
                 partial=True,
             )
             serializer.is_valid(raise_exception=True)
-            serializer.save(role=request.user.role)
+            serializer.save(role=user.role)
             return Response(serializer.data, status=status.HTTP_200_OK)
 
 
@@ -141,10 +469,9 @@ def signup(request):
     serializer = SignUpSerializer(data=request.data)
     email = request.data.get('email')
     username = request.data.get('username')
-    user = User.objects.filter(email=email, username=username)
+    user = User.objects.filter(email=email, username=username).first()
 
-    if user.exists():
-        user = user.get(email=email)
+    if user is not None:
         send_confirmation_code(user)
         return Response(
             {
@@ -154,13 +481,12 @@ def signup(request):
             status=status.HTTP_200_OK,
         )
     serializer.is_valid(raise_exception=True)
-    email = serializer.validated_data.get('email')
-    username = serializer.validated_data.get('username')
-    user, _ = User.objects.get_or_create(
-        username=username,
-        email=email,
-    )
-    send_confirmation_code(user)
+    # Занятые username и email отсекает ограничение уникальности,
+    # а не отдельные запросы перед вставкой.
+    try:
+        send_confirmation_code(User(**serializer.validated_data))
+    except IntegrityError:
+        raise ValidationError(serializer.get_unique_errors())
     return Response(serializer.data, status=status.HTTP_200_OK)
 
 
@@ -182,50 +508,156 @@ def get_token(request: request.Request) -> Response:
     return Response(f'token: {access}', status=status.HTTP_200_OK)
 
 
+@api_view(['GET'])
+@permission_classes(
+    [
+        AllowAny,
+    ],
+)
+def autocomplete(request: request.Request) -> Response:
+    """
+    Доступ к эндпойнту autocomplete/?q=дра&limit=5.
+    Жанры, категории и произведения, в названии которых слово начинается
+    с q. Подсказки берутся из индексов в памяти процесса, без запросов к базе.
+    """
+    query = request.query_params.get('q', '')
+    value = request.query_params.get('limit', settings.AUTOCOMPLETE_LIMIT)
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        limit = 0
+    if not 0 < limit <= settings.AUTOCOMPLETE_MAX_LIMIT:
+        raise ValidationError(
+            {
+                'limit': [
+                    'Укажите число от 1 до '
+                    f'{settings.AUTOCOMPLETE_MAX_LIMIT}.',
+                ],
+            },
+        )
+    return Response(
+        {
+            'genres': genre_names.search(query, limit),
+            'categories': category_names.search(query, limit),
+            'titles': title_names.search(query, limit),
+        },
+        status=status.HTTP_200_OK,
+    )
+
+
 def send_confirmation_code(user):
-    """Генерирует и отправляет код авторизации."""
+    """
+    Генерирует код авторизации и ставит письмо с ним в очередь.
+    Письмо отправит команда sendemails после коммита транзакции.
+    Нового пользователя сохраняет вместе с кодом одной вставкой.
+    """
     generated_code = default_token_generator.make_token(user)
     user.confirmation_code = (
         generated_code  # присваиваем новое значение confirmation_code
     )
-    user.save()
-
-    subject = 'YaMDb. Код авторизации.'
-    message = f'Привет, {user}! Твой код для авторизации «{generated_code}»'
-    from_email = settings.FROM_EMAIL
-    to_email = [user.email]
-    return send_mail(subject, message, from_email, to_email)
+    with transaction.atomic():
+        if user._state.adding:
+            user.save()
+        else:
+            user.save(update_fields=('confirmation_code',))
+        return OutgoingEmail.objects.create(
+            recipient=user.email,
+            subject='YaMDb. Код авторизации.',
+            body=(
+                f'Привет, {user}! Твой код для авторизации «{generated_code}»'
+            ),
+        )
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(
+    ConditionalGetMixin,
+    CachedGetMixin,
+    ExportMixin,
+    SparseFieldsMixin,
+    viewsets.ModelViewSet,
+):
     serializer_class = ReviewSerializer
     permission_classes = (IsAdminModeratorAuthorOrReadOnly,)
+    pagination_class = ReviewPagination
+    version_models = (Review, Title, User)
+    sparse_fields = {
+        'id': ('id',),
+        'title': ('title__name',),
+        'author': ('author__username',),
+        'text': ('text',),
+        'score': ('score',),
+        'pub_date': ('pub_date',),
+    }
+
+    def get_title(self):
+        return get_object_or_404(
+            Title.objects.only('id', 'name'),
+            id=self.kwargs.get('title_id'),
+        )
+
+    def get_cache_namespaces(self):
+        return ('authors', f'reviews:{self.kwargs.get("title_id")}')
 
     def get_queryset(self):
-        title = get_object_or_404(Title, id=self.kwargs.get('title_id'))
-        return title.reviews.all()
+        return Review.objects.filter(
+            title_id=self.kwargs.get('title_id'),
+        ).select_related('author', 'title')
+
+    def get_export_queryset(self):
+        self.get_title()
+        return super().get_export_queryset()
+
+    def get_paginated_response(self, data):
+        # Произведение проверяется, только если отзывов не нашлось,
+        # и до того, как пустая страница попадёт в кэш.
+        if not data:
+            self.get_title()
+        return super().get_paginated_response(data)
 
     def perform_create(self, serializer):
-        title = get_object_or_404(Title, id=self.kwargs.get('title_id'))
-        serializer.save(author=self.request.user, title=title)
+        serializer.save(author=self.request.user, title=self.get_title())
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(
+    ConditionalGetMixin,
+    CachedGetMixin,
+    SparseFieldsMixin,
+    viewsets.ModelViewSet,
+):
     serializer_class = CommentSerializer
     permission_classes = (IsAdminModeratorAuthorOrReadOnly,)
-
-    def get_queryset(self):
-        review = get_object_or_404(
-            Review,
+    pagination_class = CommentPagination
+    version_models = (Comment, Review, User)
+    sparse_fields = {
+        'id': ('id',),
+        'review': ('review__text',),
+        'author': ('author__username',),
+        'text': ('text',),
+        'pub_date': ('pub_date',),
+    }
+
+    def get_review(self):
+        return get_object_or_404(
+            Review.objects.only('id', 'text'),
             id=self.kwargs.get('review_id'),
-            title__id=self.kwargs.get('title_id'),
+            title_id=self.kwargs.get('title_id'),
         )
-        return review.comments.all()
+
+    def get_cache_namespaces(self):
+        return ('authors', f'comments:{self.kwargs.get("review_id")}')
+
+    def get_queryset(self):
+        return Comment.objects.filter(
+            review_id=self.kwargs.get('review_id'),
+            review__title_id=self.kwargs.get('title_id'),
+        ).select_related('author', 'review')
+
+    def get_paginated_response(self, data):
+        # Отзыв проверяется, только если комментариев не нашлось,
+        # и до того, как пустая страница попадёт в кэш.
+        if not data:
+            self.get_review()
+        return super().get_paginated_response(data)
 
     def perform_create(self, serializer):
-        review = get_object_or_404(
-            Review,
-            id=self.kwargs.get('review_id'),
-            title_id=self.kwargs.get('title_id'),
-        )
-        serializer.save(author=self.request.user, review=review)
+        serializer.save(author=self.request.user, review=self.get_review())
@@ -76,6 +76,35 @@ DATABASES = {
     },
 }
 
+# Cache
+# LocMemCache хранит данные в памяти процесса. Если приложение запущено
+# в нескольких процессах, укажите общий бэкенд (Redis, Memcached),
+# иначе сброс кэша дойдёт только до процесса, в котором изменили данные.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'api_yamdb',
+    },
+}
+
+API_CACHE_ALIAS = 'default'
+
+API_CACHE_TIMEOUT = 60
+
+# Сколько секунд хранится поколение пространства имён кэша ответов.
+# Истёкшее поколение начинается заново, ответы со старым не читаются.
+API_CACHE_GENERATION_TIMEOUT = 24 * 60 * 60
+
+# Через сколько секунд перечитывать справочники жанров и категорий.
+CATALOG_TIMEOUT = 60
+
+# Через сколько секунд перечитывать индексы названий для автодополнения,
+# сколько подсказок каждого вида отдавать по умолчанию и не больше скольких.
+AUTOCOMPLETE_TIMEOUT = 60
+AUTOCOMPLETE_LIMIT = 10
+AUTOCOMPLETE_MAX_LIMIT = 50
+
 # Password validation
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -115,11 +144,21 @@ STATICFILES_DIRS = ((BASE_DIR / 'static/'),)
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.StatelessJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    # JSON через orjson, если он установлен, иначе стандартный json.
+    'DEFAULT_RENDERER_CLASSES': (
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'api.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 5,
     'DEFAULT_FILTER_BACKENDS': [
@@ -128,11 +167,27 @@ REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
 }
 
+# Сколько объектов читать из базы за раз при выгрузке в NDJSON.
+EXPORT_CHUNK_SIZE = 500
+
+# Сколько произведений можно запросить одним titles/batch/?ids=.
+TITLES_BATCH_SIZE = 100
+
+# Сколько произведений можно записать одним запросом к titles/bulk/.
+TITLES_BULK_SIZE = 100
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=14),
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
 
+# Сколько расшифрованных токенов и пользователей хранить в памяти процесса.
+JWT_AUTH_CACHE_SIZE = 1024
+
+# Через сколько секунд перечитывать из базы роль и активность пользователя
+# с токеном: столько смена роли или блокировка идёт до других процессов.
+JWT_AUTH_CACHE_TIMEOUT = 30
+
 # Email
 
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
@@ -143,6 +198,14 @@ FROM_EMAIL = f'YaMDb@{DOMAIN_NAME}'
 
 EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'
 
+# Очередь писем: размер пачки sendemails, число попыток отправки
+# и пауза перед первой повторной попыткой (дальше удваивается), в секундах.
+EMAIL_OUTBOX_BATCH_SIZE = 100
+
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+
+EMAIL_OUTBOX_RETRY_DELAY = 60
+
 # CONST
 
 DEFAULT_SHOWING_SYMBOLS = 15
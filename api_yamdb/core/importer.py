@@ -0,0 +1,273 @@
+import copy
+import csv
+import gzip
+import json
+import queue
+import time
+from contextlib import contextmanager
+from itertools import islice
+from pathlib import Path
+
+from django.apps import apps
+from django.db import transaction
+
+from reviews.signals import bulk_imported
+
+DATA_PATH = Path(__file__).resolve().parent.parent / 'static' / 'data'
+
+BATCH_SIZE = 1000
+
+# Сколько разобранных пачек файла держать наготове, пока идёт запись.
+READ_AHEAD = 2
+
+FINISHED = object()
+
+
+def find_model(name):
+    """
+    Модель для csv файла: по имени модели в единственном или
+    множественном числе, а для связующих таблиц вида genre_title -
+    по моделям, на которые ссылаются её внешние ключи.
+    """
+    name = name.lower()
+    words = sorted(name.split('_'))
+    for model in apps.get_models():
+        model_name = model._meta.model_name
+        if name in (model_name, f'{model_name}s'):
+            return model
+        related = sorted(
+            field.related_model._meta.model_name
+            for field in model._meta.concrete_fields
+            if field.many_to_one
+        )
+        if len(words) > 1 and related == words:
+            return model
+    return None
+
+
+def get_dependencies(model, models):
+    """Модели из models, на которые ссылаются внешние ключи модели."""
+    return {
+        field.related_model
+        for field in model._meta.concrete_fields
+        if field.many_to_one
+        and field.related_model in models
+        and field.related_model is not model
+    }
+
+
+def get_fields(model, header):
+    """Поля модели для столбцов csv, для связей - сами внешние ключи."""
+    return [model._meta.get_field(column) for column in header]
+
+
+def read_batches(model, reader, fields, batch_size):
+    """Построчно читает csv и отдаёт объекты модели пачками."""
+    while True:
+        rows = list(islice(reader, batch_size))
+        if not rows:
+            return
+        yield [
+            model(
+                **{
+                    field.attname: (
+                        None
+                        if value in ('', None) and field.null
+                        else field.to_python(value)
+                    )
+                    for field, value in zip(fields, row)
+                },
+            )
+            for row in rows
+        ]
+
+
+def open_file(file_path, mode):
+    """Открывает файл данных как текст, сжатый .gz - через gzip."""
+    opener = gzip.open if Path(file_path).suffix == '.gz' else open
+    return opener(file_path, mode, encoding='utf-8', newline='')
+
+
+def read_ndjson(file):
+    """Отдаёт строки ndjson как строки csv: заголовок, затем значения."""
+    header = None
+    for line in file:
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        if header is None:
+            header = list(record)
+            yield header
+        yield [record.get(column) for column in header]
+
+
+@contextmanager
+def open_rows(file_path):
+    """
+    Открывает csv или ndjson файл, в том числе сжатый gzip,
+    и отдаёт итератор по строкам с заголовком в первой строке.
+    """
+    with open_file(file_path, 'rt') as file:
+        if '.ndjson' in Path(file_path).suffixes:
+            yield read_ndjson(file)
+        else:
+            yield csv.reader(file)
+
+
+def parse_file(model, file_path, batch_size=BATCH_SIZE):
+    """Построчно читает файл и отдаёт пачки объектов модели."""
+    with open_rows(file_path) as reader:
+        fields = get_fields(model, next(reader))
+        yield from read_batches(model, reader, fields, batch_size)
+
+
+class ReadAhead:
+    """
+    Пачки, которые разбираются в отдельном потоке с опережением
+    не больше чем на lookahead пачек. После stop.set() поток бросает разбор.
+    """
+
+    def __init__(self, batches, stop, lookahead):
+        self.batches = batches
+        self.stop = stop
+        self.ready = queue.Queue(maxsize=lookahead)
+
+    def put(self, item):
+        while not self.stop.is_set():
+            try:
+                self.ready.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce(self):
+        try:
+            for batch in self.batches:
+                if not self.put(batch):
+                    return
+        except Exception as error:
+            self.put(error)
+        else:
+            self.put(FINISHED)
+
+    def __iter__(self):
+        while True:
+            item = self.ready.get()
+            if item is FINISHED:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+
+def read_ahead(executor, batches, stop, lookahead=READ_AHEAD):
+    """
+    Ставит разбор пачек в пул потоков и возвращает итератор по ним.
+    В памяти одновременно не больше пачек, чем потоков в пуле,
+    умноженных на lookahead.
+    """
+    reader = ReadAhead(batches, stop, lookahead)
+    executor.submit(reader.produce)
+    return iter(reader)
+
+
+def make_report(stdout, model):
+    """Функция report для записи пачек: строки и скорость в stdout."""
+
+    def report(processed, rate):
+        stdout.write(
+            f'{model._meta.label}: обработано строк {processed}, '
+            f'{rate:.0f} строк/с',
+        )
+
+    return report
+
+
+def write_batches(model, batches, report=None):
+    """
+    Записывает пачки объектов через bulk_create, каждую в транзакции.
+    После каждой пачки передаёт в report число записанных строк
+    и скорость записи в строках в секунду.
+    """
+    started = time.monotonic()
+    written = 0
+    for objs in batches:
+        with transaction.atomic():
+            model.objects.bulk_create(objs)
+            bulk_imported.send(sender=model, objs=objs)
+        written += len(objs)
+        if report is not None:
+            elapsed = time.monotonic() - started
+            report(written, written / max(elapsed, 1e-6))
+    return written
+
+
+def get_compared_fields(fields, key_field):
+    """
+    Поля, по которым строка csv сравнивается с записью в базе.
+    Ключ и даты, которые проставляет сама модель, не обновляются.
+    """
+    return [
+        field
+        for field in fields
+        if field is not key_field
+        and not field.primary_key
+        and not getattr(field, 'auto_now', False)
+        and not getattr(field, 'auto_now_add', False)
+    ]
+
+
+def upsert_batches(model, batches, key_field, fields, report=None):
+    """
+    Сверяет пачки объектов с базой по ключу: новые записывает через
+    bulk_create, изменённые - через bulk_update, остальные пропускает.
+    На пачку уходит один запрос на чтение и по одному на запись.
+    Возвращает число добавленных, обновлённых и неизменных строк.
+    """
+    compared = get_compared_fields(fields, key_field)
+    started = time.monotonic()
+    inserted = updated = unchanged = 0
+    for objs in batches:
+        existing = model.objects.in_bulk(
+            [getattr(obj, key_field.attname) for obj in objs],
+            field_name=key_field.name,
+        )
+        new_objs = []
+        changed_objs = []
+        previous_objs = []
+        changed_fields = set()
+        for obj in objs:
+            saved = existing.get(getattr(obj, key_field.attname))
+            if saved is None:
+                new_objs.append(obj)
+                continue
+            changes = [
+                field
+                for field in compared
+                if getattr(saved, field.attname) != getattr(obj, field.attname)
+            ]
+            if not changes:
+                continue
+            previous_objs.append(copy.copy(saved))
+            for field in changes:
+                setattr(saved, field.attname, getattr(obj, field.attname))
+                changed_fields.add(field.name)
+            changed_objs.append(saved)
+
+        with transaction.atomic():
+            model.objects.bulk_create(new_objs)
+            if changed_objs:
+                model.objects.bulk_update(changed_objs, changed_fields)
+            bulk_imported.send(
+                sender=model,
+                objs=new_objs + changed_objs + previous_objs,
+            )
+        inserted += len(new_objs)
+        updated += len(changed_objs)
+        unchanged += len(objs) - len(new_objs) - len(changed_objs)
+        if report is not None:
+            processed = inserted + updated + unchanged
+            elapsed = time.monotonic() - started
+            report(processed, processed / max(elapsed, 1e-6))
+    return inserted, updated, unchanged
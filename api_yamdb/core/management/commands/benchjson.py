@@ -0,0 +1,87 @@
+import io
+import timeit
+
+from django.core.management.base import BaseCommand
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from api.parsers import FastJSONParser
+from api.renderers import FastJSONRenderer, orjson
+
+
+def make_titles(count):
+    """Страница в форме ответа ReadTitleSerializer."""
+    return {
+        'count': count,
+        'next': None,
+        'previous': None,
+        'results': [
+            {
+                'id': idx,
+                'name': f'Произведение {idx}',
+                'year': 1900 + idx % 120,
+                'rating': idx % 11 or None,
+                'description': 'Описание произведения ' * 5,
+                'genre': [
+                    {'name': 'Драма', 'slug': 'drama'},
+                    {'name': 'Комедия', 'slug': 'comedy'},
+                ],
+                'category': {'name': 'Фильм', 'slug': 'movie'},
+            }
+            for idx in range(count)
+        ],
+    }
+
+
+class Command(BaseCommand):
+    """
+    Сравнивает скорость JSONRenderer и JSONParser из DRF
+    с FastJSONRenderer и FastJSONParser на списке произведений.
+    """
+
+    help = 'Замеряет скорость рендеринга и разбора JSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--items',
+            type=int,
+            default=500,
+            help='Сколько произведений в ответе',
+        )
+        parser.add_argument(
+            '--number',
+            type=int,
+            default=200,
+            help='Сколько раз повторять замер',
+        )
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stdout.write(
+                self.style.WARNING(
+                    'orjson не установлен, быстрые классы работают '
+                    'через стандартный json.',
+                ),
+            )
+        data = make_titles(options['items'])
+        body = JSONRenderer().render(data)
+        number = options['number']
+        for name, default, fast in (
+            (
+                'render',
+                lambda: JSONRenderer().render(data),
+                lambda: FastJSONRenderer().render(data),
+            ),
+            (
+                'parse',
+                lambda: JSONParser().parse(io.BytesIO(body)),
+                lambda: FastJSONParser().parse(io.BytesIO(body)),
+            ),
+        ):
+            default_time = timeit.timeit(default, number=number)
+            fast_time = timeit.timeit(fast, number=number)
+            self.stdout.write(
+                f'{name}: DRF {default_time / number * 1000:.3f} мс, '
+                f'fast {fast_time / number * 1000:.3f} мс, '
+                f'быстрее в {default_time / fast_time:.1f} раз',
+            )
@@ -0,0 +1,121 @@
+import csv
+import json
+from pathlib import Path
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+
+from core.importer import open_file
+
+EXPORT_MODELS = (
+    'reviews.Genre',
+    'reviews.Category',
+    'reviews.Title',
+    'reviews.TitleGenre',
+    'reviews.User',
+    'reviews.Review',
+    'reviews.Comment',
+)
+
+CHUNK_SIZE = 2000
+
+
+def to_csv(value):
+    """Значение для ячейки csv в виде, который примет writecsv."""
+    if value is None:
+        return ''
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+def export_model(model, file_path, file_format, chunk_size):
+    """
+    Построчно выгружает таблицу модели в файл, не загружая её в память.
+    Столбцы называются как поля модели, поэтому файл читает writecsv.
+    """
+    fields = model._meta.concrete_fields
+    header = [field.name for field in fields]
+    rows = (
+        model._default_manager.order_by('pk')
+        .values_list(*(field.attname for field in fields))
+        .iterator(chunk_size=chunk_size)
+    )
+    exported = 0
+    with open_file(file_path, 'wt') as file:
+        if file_format == 'csv':
+            writer = csv.writer(file)
+            writer.writerow(header)
+            for row in rows:
+                writer.writerow([to_csv(value) for value in row])
+                exported += 1
+        else:
+            for row in rows:
+                file.write(
+                    json.dumps(
+                        dict(zip(header, row)),
+                        cls=DjangoJSONEncoder,
+                        ensure_ascii=False,
+                    )
+                    + '\n',
+                )
+                exported += 1
+    return exported
+
+
+class Command(BaseCommand):
+    """Выгружает таблицы моделей в csv или ndjson файлы."""
+
+    help = 'Выгружает данные моделей в csv или ndjson.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'models',
+            nargs='*',
+            default=EXPORT_MODELS,
+            help='Модели для выгрузки (appname.ModelName), по умолчанию все',
+        )
+        parser.add_argument(
+            '--format',
+            choices=('csv', 'ndjson'),
+            default='csv',
+            help='Формат файлов',
+        )
+        parser.add_argument(
+            '--gzip',
+            action='store_true',
+            help='Сжимать файлы gzip',
+        )
+        parser.add_argument(
+            '--output-dir',
+            default='.',
+            help='Папка для файлов выгрузки',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=CHUNK_SIZE,
+            help='Сколько строк читать из базы за раз',
+        )
+
+    def handle(self, *args, **options):
+        output_dir = Path(options['output_dir'])
+        output_dir.mkdir(parents=True, exist_ok=True)
+        extension = '.' + options['format']
+        if options['gzip']:
+            extension += '.gz'
+
+        for model_name in options['models']:
+            model = apps.get_model(model_name)
+            file_path = output_dir / (model._meta.model_name + extension)
+            exported = export_model(
+                model,
+                file_path,
+                options['format'],
+                options['chunk_size'],
+            )
+            self.stdout.write(
+                f'{model._meta.label}: выгружено строк {exported} '
+                f'в {file_path}',
+            )
@@ -0,0 +1,120 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from graphlib import TopologicalSorter
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.utils import IntegrityError
+
+from core.importer import (
+    BATCH_SIZE,
+    DATA_PATH,
+    find_model,
+    get_dependencies,
+    make_report,
+    parse_file,
+    read_ahead,
+    write_batches,
+)
+
+JOBS = 2
+
+
+class Command(BaseCommand):
+    """
+    Загружает все csv файлы из static/data в одной транзакции
+    в порядке зависимостей моделей по внешним ключам.
+    Файлы разбираются в пуле потоков, пока предыдущие записываются в базу.
+    Каждый поток держит наготове лишь несколько пачек, поэтому память
+    зависит от размера пачки и числа потоков, а не от размера файлов.
+    """
+
+    help = 'Загружает все csv файлы из static/data.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Сколько строк записывать одним bulk_create',
+        )
+        parser.add_argument(
+            '--jobs',
+            type=int,
+            default=JOBS,
+            help='Сколько файлов разбирать одновременно',
+        )
+
+    def handle(self, *args, **options):
+        files = {}
+        for file_path in sorted(DATA_PATH.glob('*.csv')):
+            model = find_model(file_path.stem)
+            if model is None:
+                self.stdout.write(
+                    self.style.WARNING(
+                        f'Для файла {file_path.name} не найдена модель.',
+                    ),
+                )
+                continue
+            files[model] = file_path
+
+        order = list(
+            TopologicalSorter(
+                {model: get_dependencies(model, files) for model in files},
+            ).static_order(),
+        )
+        started = time.monotonic()
+        stop = threading.Event()
+        try:
+            with ThreadPoolExecutor(max_workers=options['jobs']) as executor:
+                try:
+                    # Разбор файлов ставится в очередь пула в порядке записи,
+                    # так что нужный сейчас файл всегда уже разбирается.
+                    parsed = {
+                        model: read_ahead(
+                            executor,
+                            parse_file(
+                                model,
+                                files[model],
+                                options['batch_size'],
+                            ),
+                            stop,
+                        )
+                        for model in order
+                    }
+                    written = self.write(order, parsed)
+                finally:
+                    stop.set()
+        except IntegrityError as error:
+            self.stdout.write(
+                self.style.ERROR(
+                    f'Данные не записаны, нарушена связь между таблицами: '
+                    f'{error}',
+                ),
+            )
+            return
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Из {DATA_PATH} записано файлов: {len(order)}, '
+                f'строк: {written} за {time.monotonic() - started:.1f} с',
+            ),
+        )
+
+    def write(self, order, parsed):
+        """Записывает все файлы в одной транзакции, возвращает число строк."""
+        written = 0
+        with transaction.atomic():
+            for model in order:
+                written += write_batches(
+                    model,
+                    parsed[model],
+                    make_report(self.stdout, model),
+                )
+            # Файлы пишутся в порядке зависимостей, а внешние ключи
+            # дополнительно сверяются по всем таблицам перед коммитом.
+            connection.check_constraints(
+                table_names=[model._meta.db_table for model in order],
+            )
+        return written
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from api.cache import invalidate
+from reviews import search
+from reviews.models import Title
+from reviews.signals import bump_version
+
+
+class Command(BaseCommand):
+    """
+    Пересоздаёт триггеры полнотекстового индекса произведений
+    и заполняет индекс заново.
+    """
+
+    help = 'Перестраивает полнотекстовый индекс произведений.'
+
+    def handle(self, *args, **options):
+        if not search.is_supported(connection):
+            raise CommandError(
+                'Полнотекстовый индекс FTS5 есть только в SQLite.',
+            )
+        with transaction.atomic():
+            search.uninstall(connection)
+            search.install(connection)
+            indexed = search.rebuild(connection)
+            # Выдача поиска могла измениться, кэш и ETag списка устарели.
+            bump_version(Title)
+        invalidate('titles')
+        self.stdout.write(
+            self.style.SUCCESS(f'Проиндексировано произведений: {indexed}'),
+        )
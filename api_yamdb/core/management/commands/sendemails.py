@@ -0,0 +1,121 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from reviews.models import OutgoingEmail
+
+
+class Command(BaseCommand):
+    """
+    Отправляет письма из очереди OutgoingEmail пачками
+    через одно соединение с почтовым сервером.
+    """
+
+    help = 'Отправляет письма из очереди.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Разобрать очередь один раз и завершиться',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.EMAIL_OUTBOX_BATCH_SIZE,
+            help='Сколько писем отправлять за одно соединение',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5,
+            help='Пауза между проверками пустой очереди, в секундах',
+        )
+
+    def handle(self, *args, **options):
+        sent = failed = 0
+        while True:
+            emails = self.claim(options['batch_size'])
+            if emails:
+                batch_sent, batch_failed = self.send(emails)
+                sent += batch_sent
+                failed += batch_failed
+                continue
+            if options['once']:
+                break
+            time.sleep(options['interval'])
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Отправлено писем: {sent}, не удалось отправить: {failed}',
+            ),
+        )
+
+    def claim(self, batch_size):
+        """
+        Забирает пачку писем, которым пора уходить, и откладывает их
+        следующую попытку, чтобы параллельный воркер их не взял.
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            emails = list(
+                OutgoingEmail.objects.select_for_update(skip_locked=True)
+                .filter(
+                    next_attempt__lte=now,
+                    attempts__lt=settings.EMAIL_OUTBOX_MAX_ATTEMPTS,
+                )[:batch_size],
+            )
+            OutgoingEmail.objects.filter(
+                id__in=[email.id for email in emails],
+            ).update(
+                next_attempt=now
+                + timedelta(seconds=settings.EMAIL_OUTBOX_RETRY_DELAY),
+            )
+        return emails
+
+    def send(self, emails):
+        """
+        Отправляет письма, удаляет доставленные,
+        а упавшим назначает повторную попытку с удвоенной паузой.
+        """
+        sent_ids = []
+        failed = []
+        with get_connection() as connection:
+            for email in emails:
+                message = EmailMessage(
+                    email.subject,
+                    email.body,
+                    settings.FROM_EMAIL,
+                    [email.recipient],
+                    connection=connection,
+                )
+                try:
+                    message.send()
+                except Exception as error:
+                    email.attempts += 1
+                    email.last_error = repr(error)
+                    email.next_attempt = timezone.now() + timedelta(
+                        seconds=settings.EMAIL_OUTBOX_RETRY_DELAY
+                        * 2 ** (email.attempts - 1),
+                    )
+                    failed.append(email)
+                    # Соединение после ошибки могло оборваться.
+                    connection.close()
+                    try:
+                        connection.open()
+                    except Exception:
+                        pass
+                else:
+                    sent_ids.append(email.id)
+
+        OutgoingEmail.objects.filter(id__in=sent_ids).delete()
+        OutgoingEmail.objects.bulk_update(
+            failed,
+            ('attempts', 'last_error', 'next_attempt'),
+        )
+        return len(sent_ids), len(failed)
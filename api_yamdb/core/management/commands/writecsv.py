@@ -1,17 +1,20 @@
-import csv
 import os
 from pathlib import Path
 
-import django
 from django.apps import apps
-from django.core.management.base import BaseCommand
-from django.db.utils import OperationalError
+from django.core.management.base import BaseCommand, CommandError
+from django.db.utils import IntegrityError, OperationalError
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.api_yamdb.settings')
-django.setup()
-
-
-path = Path(__file__).resolve().parent.parent.parent.parent / 'static' / 'data'
+from core.importer import (
+    BATCH_SIZE,
+    DATA_PATH,
+    get_fields,
+    make_report,
+    open_rows,
+    read_batches,
+    upsert_batches,
+    write_batches,
+)
 
 
 class Command(BaseCommand):
@@ -22,29 +25,73 @@ class Command(BaseCommand):
             'model',
             help='Модель для которой записываются данные (appname.ModelName)',
         )
-        parser.add_argument('csv_file', help='Имя csv файла')
+        parser.add_argument(
+            'csv_file',
+            help=(
+                'Имя csv файла или файла выгрузки с расширением '
+                '(.csv, .ndjson, сжатые .gz)'
+            ),
+        )
+        mode = parser.add_mutually_exclusive_group()
+        mode.add_argument(
+            '--bulk',
+            action='store_true',
+            help='Записывать пачками через bulk_create, каждую в транзакции',
+        )
+        mode.add_argument(
+            '--upsert',
+            action='store_true',
+            help='Добавлять новые и обновлять изменённые строки пачками',
+        )
+        parser.add_argument(
+            '--key',
+            help=(
+                'Уникальное поле, по которому --upsert находит строку в базе, '
+                'по умолчанию первичный ключ'
+            ),
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Размер пачки для --bulk и --upsert',
+        )
 
     def handle(self, *args, **options):
         model_name = options['model']
-        file_name = options['csv_file'] + '.csv'
+        file_name = options['csv_file']
+        if not Path(file_name).suffix:
+            file_name += '.csv'
 
-        file_path = os.path.join(path, file_name)
+        file_path = os.path.join(DATA_PATH, file_name)
         model = apps.get_model(model_name)
 
         try:
-            with open(file_path, 'r', encoding='utf-8') as csv_file:
-                reader = csv.reader(csv_file)
-
+            with open_rows(file_path) as reader:
                 fields = next(reader)
 
-                for row in reader:
-                    obj = model()
-                    for field_index, field in enumerate(fields):
-                        if hasattr(obj, field + '_id'):
-                            setattr(obj, field + '_id', row[field_index])
-                        else:
-                            setattr(obj, field, row[field_index])
-                    obj.save()
+                if options['upsert']:
+                    self.upsert(model, reader, fields, options)
+                elif options['bulk']:
+                    write_batches(
+                        model,
+                        read_batches(
+                            model,
+                            reader,
+                            get_fields(model, fields),
+                            options['batch_size'],
+                        ),
+                        make_report(self.stdout, model),
+                    )
+                else:
+                    for row in reader:
+                        obj = model()
+                        for field_index, field in enumerate(fields):
+                            if hasattr(obj, field + '_id'):
+                                setattr(obj, field + '_id', row[field_index])
+                            else:
+                                setattr(obj, field, row[field_index])
+                        obj.save()
 
             self.stdout.write(
                 self.style.SUCCESS(
@@ -53,10 +100,34 @@ class Command(BaseCommand):
             )
         except FileNotFoundError:
             self.stdout.write(self.style.ERROR(f'Файл {file_name} не найден.'))
-        except OperationalError:
+        except (IntegrityError, OperationalError):
             self.stdout.write(
                 self.style.ERROR(
                     'Вы попытались заполнить таблицу со '
                     'связанным полем, но не заполнили внешнюю.',
                 ),
             )
+
+    def upsert(self, model, reader, header, options):
+        """Сверяет строки файла с базой и выводит итог по ним."""
+        fields = get_fields(model, header)
+        key_field = (
+            model._meta.get_field(options['key'])
+            if options['key']
+            else model._meta.pk
+        )
+        if not (key_field.primary_key or key_field.unique):
+            raise CommandError(f'Поле {key_field.name} не уникально.')
+        if key_field not in fields:
+            raise CommandError(f'В файле нет столбца {key_field.name}.')
+        inserted, updated, unchanged = upsert_batches(
+            model,
+            read_batches(model, reader, fields, options['batch_size']),
+            key_field,
+            fields,
+            make_report(self.stdout, model),
+        )
+        self.stdout.write(
+            f'Добавлено: {inserted}, обновлено: {updated}, '
+            f'без изменений: {unchanged}',
+        )
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from reviews.models import Comment, Review, User
+from reviews.models import Comment, OutgoingEmail, Review, User
 
 
 class UserAdmin(admin.ModelAdmin):
@@ -18,3 +18,4 @@ class UserAdmin(admin.ModelAdmin):
 admin.site.register(User)
 admin.site.register(Review)
 admin.site.register(Comment)
+admin.site.register(OutgoingEmail)
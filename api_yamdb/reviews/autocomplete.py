@@ -0,0 +1,175 @@
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+
+from django.conf import settings
+
+from reviews.models import Category, Genre, ModelVersion, Title
+
+NOT_LOADED = object()
+
+
+def normalize(value):
+    """Название в нижнем регистре, без знаков препинания и с е вместо ё."""
+    return ' '.join(re.findall(r'\w+', value.lower().replace('ё', 'е')))
+
+
+def matches(words, offset, prefix):
+    """
+    Слова названия с номера offset совпадают со словами prefix,
+    последнее слово prefix может быть началом слова названия.
+    """
+    tail = words[offset:offset + len(prefix)]
+    return (
+        len(tail) == len(prefix)
+        and tail[:-1] == prefix[:-1]
+        and tail[-1].startswith(prefix[-1])
+    )
+
+
+class PrefixIndex:
+    """
+    Отсортированный в памяти процесса список слов названий модели для
+    поиска по началу слова. Загружается целиком при первом обращении,
+    сигналы сохранения и удаления правят его по одной записи.
+    Раз в AUTOCOMPLETE_TIMEOUT секунд индекс сверяет версию модели
+    в ModelVersion и перечитывается, только если модель меняли,
+    например в другом процессе. Перечитывает один поток, остальные
+    тем временем ищут по прежним данным.
+    Для названия хранятся ключи (слово, номер слова, id): первое слово
+    в starts, остальные в words, совпадения с начала названия идут первыми.
+    """
+
+    def __init__(self, model, fields):
+        self.model = model
+        self.fields = fields
+        self.lock = threading.Lock()
+        self.load_lock = threading.Lock()
+        self.items = {}
+        self.starts = []
+        self.words = []
+        self.invalidate()
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def invalidate(self):
+        self.version = NOT_LOADED
+        self.checked_at = None
+
+    def get_version(self):
+        return (
+            ModelVersion.objects.filter(name=self.model._meta.label_lower)
+            .values_list('version', flat=True)
+            .first()
+        )
+
+    def is_checked(self):
+        return self.checked_at is not None and (
+            time.monotonic() - self.checked_at
+            <= settings.AUTOCOMPLETE_TIMEOUT
+        )
+
+    def ensure_loaded(self):
+        if self.is_checked():
+            return
+        with self.load_lock:
+            # Пока ждали блокировку, индекс мог проверить другой поток.
+            if self.is_checked():
+                return
+            # Версия читается до строк: изменение между запросами
+            # вызовет лишнее перечитывание, но не потеряется.
+            version = self.get_version()
+            if version != self.version:
+                self.load(version)
+            self.checked_at = time.monotonic()
+
+    def load(self, version):
+        items, starts, words = {}, [], []
+        for obj_id, *values in self.model.objects.values_list(
+            'pk', *self.fields,
+        ):
+            item = dict(zip(self.fields, values))
+            items[obj_id] = (item, normalize(item['name']).split())
+            first, rest = self.get_keys(obj_id, items[obj_id][1])
+            starts += first
+            words += rest
+        starts.sort()
+        words.sort()
+        with self.lock:
+            self.items, self.starts, self.words = items, starts, words
+            self.version = version
+
+    def get_keys(self, obj_id, words):
+        """Ключи записи в списки starts и words."""
+        keys = [(word, offset, obj_id) for offset, word in enumerate(words)]
+        return keys[:1], keys[1:]
+
+    def insert(self, obj_id, item):
+        words = normalize(item['name']).split()
+        self.items[obj_id] = (item, words)
+        for key_list, keys in zip(
+            (self.starts, self.words), self.get_keys(obj_id, words),
+        ):
+            for key in keys:
+                insort(key_list, key)
+
+    def delete(self, obj_id):
+        item = self.items.pop(obj_id, None)
+        if item is None:
+            return
+        for key_list, keys in zip(
+            (self.starts, self.words), self.get_keys(obj_id, item[1]),
+        ):
+            for key in keys:
+                idx = bisect_left(key_list, key)
+                if idx < len(key_list) and key_list[idx] == key:
+                    del key_list[idx]
+
+    def add(self, obj):
+        """Добавляет или обновляет объект в уже загруженном индексе."""
+        if self.version is NOT_LOADED:
+            return
+        with self.lock:
+            self.delete(obj.pk)
+            self.insert(
+                obj.pk,
+                {field: getattr(obj, field) for field in self.fields},
+            )
+
+    def remove(self, obj_id):
+        if self.version is NOT_LOADED:
+            return
+        with self.lock:
+            self.delete(obj_id)
+
+    def search(self, prefix, limit):
+        """До limit записей, в названии которых слово начинается с prefix."""
+        prefix = normalize(prefix).split()
+        if not prefix:
+            return []
+        self.ensure_loaded()
+        # Для нескольких слов первое должно совпасть целиком,
+        # такие ключи идут в начале диапазона.
+        exact = len(prefix) > 1
+        found = {}
+        with self.lock:
+            for key_list in (self.starts, self.words):
+                idx = bisect_left(key_list, (prefix[0],))
+                while len(found) < limit and idx < len(key_list):
+                    word, offset, obj_id = key_list[idx]
+                    if not word.startswith(prefix[0]) or (
+                        exact and word != prefix[0]
+                    ):
+                        break
+                    item, words = self.items[obj_id]
+                    if matches(words, offset, prefix):
+                        found.setdefault(obj_id, item)
+                    idx += 1
+        return list(found.values())
+
+
+genre_names = PrefixIndex(Genre, ('name', 'slug'))
+category_names = PrefixIndex(Category, ('name', 'slug'))
+title_names = PrefixIndex(Title, ('id', 'name'))
@@ -0,0 +1,69 @@
+import time
+
+from django.conf import settings
+
+from reviews.models import Category, Genre
+
+
+class Catalog:
+    """
+    Справочник объектов небольшой модели в памяти процесса.
+    Загружается целиком при первом обращении, сбрасывается сигналами
+    при изменениях и перечитывается по таймауту или при промахе,
+    чтобы увидеть изменения из других процессов.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.by_id = None
+        self.by_slug = None
+        self.loaded_at = None
+
+    def __deepcopy__(self, memo):
+        # Поля сериализаторов копируются вместе с аргументами,
+        # справочник при этом должен оставаться общим.
+        return self
+
+    def load(self):
+        objects = list(self.model.objects.all())
+        self.by_id = {obj.id: obj for obj in objects}
+        self.by_slug = {obj.slug: obj for obj in objects}
+        self.loaded_at = time.monotonic()
+
+    def invalidate(self):
+        self.loaded_at = None
+
+    def ensure_loaded(self):
+        if (
+            self.loaded_at is None
+            or time.monotonic() - self.loaded_at > settings.CATALOG_TIMEOUT
+        ):
+            self.load()
+
+    def get_by_slug(self, slug):
+        self.ensure_loaded()
+        if slug not in self.by_slug:
+            self.load()
+        return self.by_slug.get(slug)
+
+    def get_many(self, ids):
+        self.ensure_loaded()
+        if any(obj_id not in self.by_id for obj_id in ids):
+            self.load()
+        return [self.by_id[obj_id] for obj_id in ids if obj_id in self.by_id]
+
+    def get_by_id(self, obj_id):
+        objects = self.get_many([obj_id])
+        return objects[0] if objects else None
+
+    def ids_with_slug_containing(self, value):
+        """Аналог slug__icontains без обращения к базе."""
+        self.ensure_loaded()
+        value = value.lower()
+        return [
+            obj.id for obj in self.by_id.values() if value in obj.slug.lower()
+        ]
+
+
+genres = Catalog(Genre)
+categories = Catalog(Category)
@@ -0,0 +1,45 @@
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def fill_rating(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    Review = apps.get_model('reviews', 'Review')
+    reviews = (
+        Review.objects.filter(title=OuterRef('pk'))
+        .order_by()
+        .values('title')
+    )
+    # Одним UPDATE для всех произведений, без сохранения по одному.
+    Title.objects.update(
+        rating_sum=Coalesce(
+            Subquery(reviews.annotate(total=Sum('score')).values('total')),
+            Value(0),
+        ),
+        rating_count=Coalesce(
+            Subquery(reviews.annotate(total=Count('id')).values('total')),
+            Value(0),
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество оценок'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Сумма оценок'),
+        ),
+        migrations.RunPython(fill_rating, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count
+
+
+def fill_scores(apps, schema_editor):
+    Review = apps.get_model('reviews', 'Review')
+    TitleScore = apps.get_model('reviews', 'TitleScore')
+    rows = (
+        Review.objects.order_by()
+        .values('title_id', 'score')
+        .annotate(count=Count('id'))
+    )
+    TitleScore.objects.bulk_create(
+        (TitleScore(**row) for row in rows.iterator()),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0002_title_rating'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TitleScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.IntegerField(verbose_name='оценка')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='количество отзывов')),
+                ('title', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scores', to='reviews.title', verbose_name='произведение')),
+            ],
+            options={
+                'ordering': ('score',),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='titlescore',
+            constraint=models.UniqueConstraint(fields=('title', 'score'), name='unique_title_score'),
+        ),
+        migrations.RunPython(fill_scores, migrations.RunPython.noop),
+    ]
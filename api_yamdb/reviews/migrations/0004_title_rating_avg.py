@@ -0,0 +1,39 @@
+from django.db import migrations, models
+from django.db.models import FloatField
+from django.db.models.functions import Cast
+
+
+def fill_rating_avg(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    Title.objects.filter(rating_count__gt=0).update(
+        rating_avg=Cast('rating_sum', FloatField())
+        / Cast('rating_count', FloatField()),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0003_titlescore'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='rating_avg',
+            field=models.FloatField(default=0, editable=False, verbose_name='Средняя оценка'),
+        ),
+        migrations.RunPython(fill_rating_avg, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['rating_avg', 'id'], name='title_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['year', 'id'], name='title_year_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['name', 'id'], name='title_name_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0004_title_rating_avg'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ModelVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=60, unique=True, verbose_name='Модель')),
+                ('version', models.PositiveBigIntegerField(default=0, verbose_name='Версия')),
+                ('modified', models.DateTimeField(verbose_name='Дата изменения')),
+            ],
+            options={
+                'ordering': ('name',),
+            },
+        ),
+    ]
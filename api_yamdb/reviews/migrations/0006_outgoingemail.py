@@ -0,0 +1,28 @@
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0005_modelversion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutgoingEmail',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('recipient', models.EmailField(max_length=254, verbose_name='Получатель')),
+                ('subject', models.CharField(max_length=256, verbose_name='Тема')),
+                ('body', models.TextField(verbose_name='Текст')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('next_attempt', models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='Следующая попытка')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Попыток отправки')),
+                ('last_error', models.TextField(blank=True, verbose_name='Последняя ошибка')),
+            ],
+            options={
+                'ordering': ('next_attempt', 'id'),
+            },
+        ),
+    ]
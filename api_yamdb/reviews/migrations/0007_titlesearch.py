@@ -0,0 +1,42 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+import reviews.search
+
+
+def install_search(apps, schema_editor):
+    connection = schema_editor.connection
+    if reviews.search.is_supported(connection):
+        reviews.search.install(connection)
+        reviews.search.rebuild(connection)
+
+
+def uninstall_search(apps, schema_editor):
+    connection = schema_editor.connection
+    if reviews.search.is_supported(connection):
+        reviews.search.uninstall(connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0006_outgoingemail'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TitleSearch',
+            fields=[
+                ('title', models.OneToOneField(db_column='rowid', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search', serialize=False, to='reviews.title')),
+                ('name', models.TextField()),
+                ('description', models.TextField(null=True)),
+                ('document', reviews.search.FullTextField(db_column='title_search')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'title_search',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(install_search, uninstall_search),
+    ]
@@ -1,7 +1,10 @@
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
+
+from reviews.search import FullTextField
 
 
 class User(AbstractUser):
@@ -156,13 +159,68 @@ class Title(models.Model):
         null=True,
         verbose_name='Категория',
     )
+    rating_sum = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Сумма оценок',
+    )
+    rating_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество оценок',
+    )
+    rating_avg = models.FloatField(
+        default=0,
+        editable=False,
+        verbose_name='Средняя оценка',
+    )
 
     class Meta:
         ordering = ('name',)
+        indexes = [
+            models.Index(fields=('rating_avg', 'id'), name='title_rating_idx'),
+            models.Index(fields=('year', 'id'), name='title_year_idx'),
+            models.Index(fields=('name', 'id'), name='title_name_idx'),
+        ]
 
     def __str__(self):
         return self.name[:settings.DEFAULT_SHOWING_SYMBOLS]
 
+    @property
+    def rating(self):
+        """Средняя оценка по сохранённым сумме и количеству отзывов."""
+        if not self.rating_count:
+            return None
+        return self.rating_sum / self.rating_count
+
+
+class TitleScore(models.Model):
+    """Хранит количество отзывов с каждой оценкой для произведения."""
+
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='scores',
+        verbose_name='произведение',
+    )
+    score = models.IntegerField(verbose_name='оценка')
+    count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='количество отзывов',
+    )
+
+    class Meta:
+        ordering = ('score',)
+        constraints = [
+            models.UniqueConstraint(
+                fields=('title', 'score'),
+                name='unique_title_score',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.title_id}: {self.score}'
+
 
 class TitleGenre(models.Model):
     """Описывает связующую модель для привязки жанров к произведениям."""
@@ -174,7 +232,34 @@ class TitleGenre(models.Model):
         db_table = 'title_genres'
 
 
+class TitleSearch(models.Model):
+    """
+    Полнотекстовый индекс SQLite FTS5 по названию и описанию произведений.
+    Таблицу и триггеры, которые держат её в актуальном состоянии,
+    создаёт reviews.search.
+    """
+
+    title = models.OneToOneField(
+        Title,
+        primary_key=True,
+        db_column='rowid',
+        db_constraint=False,
+        on_delete=models.DO_NOTHING,
+        related_name='search',
+    )
+    name = models.TextField()
+    description = models.TextField(null=True)
+    document = FullTextField(db_column='title_search')
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = 'title_search'
+
+
 class Review(models.Model):
+    """Описывает модель отзыва на произведение."""
+
     text = models.TextField(verbose_name='текст отзыва')
     author = models.ForeignKey(
         User,
@@ -205,9 +290,45 @@ class Review(models.Model):
         ordering = ('-pub_date',)
         unique_together = ('title', 'author')
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.remember_rating_state()
+
     def __str__(self):
         return self.text[:settings.DEFAULT_SHOWING_SYMBOLS]
 
+    def save(self, *args, **kwargs):
+        # Рейтинг произведения пересчитывается в post_save,
+        # поэтому запись отзыва и рейтинга идут в одной транзакции.
+        with transaction.atomic():
+            if not self._state.adding:
+                self.lock_rating_state()
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            self.lock_rating_state()
+            return super().delete(*args, **kwargs)
+
+    def remember_rating_state(self):
+        """Запоминает оценку и произведение, учтённые в рейтинге."""
+        self.saved_title_id = self.__dict__.get('title_id')
+        self.saved_score = self.__dict__.get('score')
+
+    def lock_rating_state(self):
+        """
+        Блокирует строку отзыва до конца транзакции и берёт учтённые
+        в рейтинге оценку и произведение из базы: значения в памяти
+        могли устареть, пока отзыв параллельно правили.
+        """
+        saved = (
+            Review.objects.select_for_update()
+            .filter(pk=self.pk)
+            .values_list('title_id', 'score')
+            .first()
+        )
+        self.saved_title_id, self.saved_score = saved or (None, None)
+
 
 class Comment(models.Model):
     text = models.TextField(verbose_name='текст комментария')
@@ -233,3 +354,61 @@ class Comment(models.Model):
 
     def __str__(self):
         return self.text[:settings.DEFAULT_SHOWING_SYMBOLS]
+
+
+class ModelVersion(models.Model):
+    """Счётчик изменений модели для ETag и Last-Modified в API."""
+
+    name = models.CharField(
+        max_length=settings.MAX_LENGTH_CORE,
+        unique=True,
+        verbose_name='Модель',
+    )
+    version = models.PositiveBigIntegerField(
+        default=0,
+        verbose_name='Версия',
+    )
+    modified = models.DateTimeField(verbose_name='Дата изменения')
+
+    class Meta:
+        ordering = ('name',)
+
+    def __str__(self):
+        return f'{self.name}: {self.version}'
+
+
+class OutgoingEmail(models.Model):
+    """Письмо в очереди на отправку командой sendemails."""
+
+    recipient = models.EmailField(
+        max_length=settings.MAX_LENGTH_EMAIL,
+        verbose_name='Получатель',
+    )
+    subject = models.CharField(
+        max_length=settings.MAX_LENGTH,
+        verbose_name='Тема',
+    )
+    body = models.TextField(verbose_name='Текст')
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата создания',
+    )
+    next_attempt = models.DateTimeField(
+        default=timezone.now,
+        db_index=True,
+        verbose_name='Следующая попытка',
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Попыток отправки',
+    )
+    last_error = models.TextField(
+        blank=True,
+        verbose_name='Последняя ошибка',
+    )
+
+    class Meta:
+        ordering = ('next_attempt', 'id')
+
+    def __str__(self):
+        return f'{self.recipient}: {self.subject}'
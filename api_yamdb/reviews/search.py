@@ -0,0 +1,120 @@
+import re
+
+from django.db import models
+
+TABLE = 'title_search'
+
+# Совпадение в названии весит больше совпадения в описании.
+RANK = 'bm25(10.0, 1.0)'
+
+TRIGGERS = {
+    'title_search_insert': (
+        'AFTER INSERT ON reviews_title BEGIN {insert}; END'
+    ),
+    'title_search_update': (
+        'AFTER UPDATE OF name, description ON reviews_title '
+        'BEGIN {delete}; {insert}; END'
+    ),
+    'title_search_delete': 'AFTER DELETE ON reviews_title BEGIN {delete}; END',
+}
+
+
+def normalize(column):
+    """SQL-выражение, в котором ё заменена на е, как в поисковом запросе."""
+    return f"replace(replace({column}, 'ё', 'е'), 'Ё', 'Е')"
+
+
+INSERT = (
+    f'INSERT INTO {TABLE} (rowid, name, description) '
+    f'SELECT {{id}}, {normalize("{name}")}, {normalize("{description}")}'
+)
+
+
+class FullTextField(models.TextField):
+    """Скрытый столбец таблицы FTS5, по которому ищет lookup match."""
+
+
+@FullTextField.register_lookup
+class Match(models.Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', lhs_params + rhs_params
+
+
+def is_supported(connection):
+    return connection.vendor == 'sqlite'
+
+
+def make_query(value):
+    """
+    Запрос FTS5 из строки поиска: каждое слово ищется по префиксу,
+    все слова должны встретиться. Операторы FTS5 из строки не проходят.
+    """
+    words = re.findall(r'\w+', value.replace('ё', 'е').replace('Ё', 'Е'))
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def install(connection):
+    """
+    Создаёт таблицу индекса и триггеры, которые обновляют её при записи
+    в reviews_title, в том числе через bulk_create и update().
+    Возвращает True, если чего-то не хватало и индекс нужно перестроить.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' "
+            'AND name IN (%s, %s, %s)',
+            list(TRIGGERS),
+        )
+        existing = {row[0] for row in cursor.fetchall()}
+        if existing == set(TRIGGERS):
+            return False
+        cursor.execute(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} '
+            'USING fts5(name, description, '
+            "tokenize = 'unicode61 remove_diacritics 2')",
+        )
+        cursor.execute(
+            f"INSERT INTO {TABLE} ({TABLE}, rank) VALUES ('rank', %s)",
+            [RANK],
+        )
+        for name, body in TRIGGERS.items():
+            cursor.execute(
+                f'CREATE TRIGGER IF NOT EXISTS {name} '
+                + body.format(
+                    insert=INSERT.format(
+                        id='new.id',
+                        name='new.name',
+                        description='new.description',
+                    ),
+                    delete=f'DELETE FROM {TABLE} WHERE rowid = old.id',
+                ),
+            )
+    return True
+
+
+def uninstall(connection):
+    with connection.cursor() as cursor:
+        for name in TRIGGERS:
+            cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+        cursor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+
+
+def rebuild(connection):
+    """Заполняет индекс заново по всем произведениям."""
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE}')
+        cursor.execute(
+            INSERT.format(
+                id='id',
+                name='name',
+                description='description',
+            )
+            + ' FROM reviews_title',
+        )
+        cursor.execute(f"INSERT INTO {TABLE} ({TABLE}) VALUES ('optimize')")
+        cursor.execute(f'SELECT count(*) FROM {TABLE}')
+        return cursor.fetchone()[0]
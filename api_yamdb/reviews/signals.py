@@ -0,0 +1,252 @@
+from functools import partial
+
+from django.db import connections, transaction
+from django.db.models import Count, F, FloatField, Sum, Value
+from django.db.models.functions import Cast, Coalesce, NullIf
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_migrate,
+    post_save,
+)
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+
+from reviews import search
+from reviews.autocomplete import category_names, genre_names, title_names
+from reviews.catalog import categories, genres
+from reviews.models import (
+    Category,
+    Comment,
+    Genre,
+    ModelVersion,
+    Review,
+    Title,
+    TitleGenre,
+    TitleScore,
+    User,
+)
+
+VERSIONED_MODELS = (Category, Comment, Genre, Review, Title)
+
+NAME_INDEXES = {
+    Category: category_names,
+    Genre: genre_names,
+    Title: title_names,
+}
+
+# Отправляется после массовой записи пачки объектов в обход save(),
+# аргумент objs - записанные объекты и прежние версии изменённых.
+bulk_imported = Signal()
+
+
+def change_rating(title_id, score_delta, count_delta):
+    """Атомарно сдвигает сохранённые сумму, количество и среднюю оценку."""
+    rating_sum = F('rating_sum') + score_delta
+    rating_count = F('rating_count') + count_delta
+    Title.objects.filter(id=title_id).update(
+        rating_sum=rating_sum,
+        rating_count=rating_count,
+        rating_avg=Coalesce(
+            Cast(rating_sum, FloatField())
+            / NullIf(Cast(rating_count, FloatField()), Value(0.0)),
+            Value(0.0),
+        ),
+    )
+
+
+def change_score_count(title_id, score, delta):
+    """Сдвигает счётчик одной оценки в гистограмме произведения."""
+    if delta > 0:
+        # Строка вставляется с нулём, если её ещё нет, а сдвиг всегда идёт
+        # через UPDATE: параллельная вставка той же оценки не падает
+        # на unique_title_score и не теряет ничей отзыв.
+        TitleScore.objects.bulk_create(
+            [TitleScore(title_id=title_id, score=score, count=0)],
+            ignore_conflicts=True,
+        )
+    TitleScore.objects.filter(title_id=title_id, score=score).update(
+        count=F('count') + delta,
+    )
+
+
+def add_score(title_id, score):
+    change_rating(title_id, score, 1)
+    change_score_count(title_id, score, 1)
+
+
+def remove_score(title_id, score):
+    change_rating(title_id, -score, -1)
+    change_score_count(title_id, score, -1)
+
+
+def recalculate_ratings(title_ids):
+    """Пересчитывает рейтинги и гистограммы произведений по их отзывам."""
+    title_ids = set(title_ids)
+    reviews = Review.objects.filter(title_id__in=title_ids).order_by()
+    totals = {
+        row['title_id']: row
+        for row in reviews.values('title_id').annotate(
+            score_sum=Sum('score'),
+            score_count=Count('id'),
+        )
+    }
+    titles = []
+    for title_id in title_ids:
+        row = totals.get(title_id, {'score_sum': 0, 'score_count': 0})
+        titles.append(
+            Title(
+                id=title_id,
+                rating_sum=row['score_sum'],
+                rating_count=row['score_count'],
+                rating_avg=(
+                    row['score_sum'] / row['score_count']
+                    if row['score_count']
+                    else 0
+                ),
+            ),
+        )
+    Title.objects.bulk_update(
+        titles,
+        ('rating_sum', 'rating_count', 'rating_avg'),
+    )
+    TitleScore.objects.filter(title_id__in=title_ids).delete()
+    TitleScore.objects.bulk_create(
+        TitleScore(
+            title_id=row['title_id'],
+            score=row['score'],
+            count=row['count'],
+        )
+        for row in reviews.values('title_id', 'score').annotate(
+            count=Count('id'),
+        )
+    )
+
+
+def recalculate_rating(title_id):
+    """Пересчитывает рейтинг и гистограмму произведения по его отзывам."""
+    recalculate_ratings([title_id])
+
+
+@receiver(post_save, sender=Review)
+def update_rating_on_save(sender, instance, created, **kwargs):
+    score = int(instance.score)
+    if created:
+        add_score(instance.title_id, score)
+    elif instance.saved_title_id is None or instance.saved_score is None:
+        # Объект загружен без поля оценки, прежнее значение неизвестно.
+        recalculate_rating(instance.title_id)
+    elif instance.saved_title_id != instance.title_id:
+        remove_score(instance.saved_title_id, int(instance.saved_score))
+        add_score(instance.title_id, score)
+    elif int(instance.saved_score) != score:
+        saved_score = int(instance.saved_score)
+        change_rating(instance.title_id, score - saved_score, 0)
+        change_score_count(instance.title_id, saved_score, -1)
+        change_score_count(instance.title_id, score, 1)
+    instance.remember_rating_state()
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_delete(sender, instance, **kwargs):
+    if instance.saved_title_id is None or instance.saved_score is None:
+        recalculate_rating(instance.title_id)
+        return
+    remove_score(instance.saved_title_id, int(instance.saved_score))
+
+
+def bump_version(model):
+    """Увеличивает счётчик изменений модели."""
+    name = model._meta.label_lower
+    now = timezone.now()
+    updated = ModelVersion.objects.filter(name=name).update(
+        version=F('version') + 1,
+        modified=now,
+    )
+    if not updated:
+        ModelVersion.objects.get_or_create(
+            name=name,
+            defaults={'version': 1, 'modified': now},
+        )
+
+
+def bump_version_on_change(sender, **kwargs):
+    bump_version(sender)
+
+
+for versioned_model in VERSIONED_MODELS:
+    post_save.connect(bump_version_on_change, sender=versioned_model)
+    post_delete.connect(bump_version_on_change, sender=versioned_model)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def bump_title_version_on_genres(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        bump_version(Title)
+
+
+@receiver(post_save, sender=User)
+def bump_user_version_on_save(sender, created, update_fields, **kwargs):
+    # В отзывах и комментариях выводится только username автора,
+    # у нового пользователя их ещё нет.
+    if not created and (update_fields is None or 'username' in update_fields):
+        bump_version(User)
+
+
+@receiver(post_delete, sender=User)
+def bump_user_version_on_delete(sender, **kwargs):
+    bump_version(User)
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+def invalidate_genres(sender, **kwargs):
+    transaction.on_commit(genres.invalidate)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_categories(sender, **kwargs):
+    transaction.on_commit(categories.invalidate)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Genre)
+@receiver(post_save, sender=Title)
+def update_name_index_on_save(sender, instance, update_fields, **kwargs):
+    if update_fields is None or 'name' in update_fields:
+        transaction.on_commit(partial(NAME_INDEXES[sender].add, instance))
+
+
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Genre)
+@receiver(post_delete, sender=Title)
+def update_name_index_on_delete(sender, instance, **kwargs):
+    transaction.on_commit(partial(NAME_INDEXES[sender].remove, instance.pk))
+
+
+@receiver(bulk_imported)
+def update_on_bulk_import(sender, objs, **kwargs):
+    if sender is TitleGenre:
+        bump_version(Title)
+    elif sender in VERSIONED_MODELS or sender is User:
+        bump_version(sender)
+    if sender is Review:
+        recalculate_ratings(obj.title_id for obj in objs)
+    elif sender is Genre:
+        transaction.on_commit(genres.invalidate)
+    elif sender is Category:
+        transaction.on_commit(categories.invalidate)
+    if sender in NAME_INDEXES:
+        transaction.on_commit(NAME_INDEXES[sender].invalidate)
+
+
+@receiver(post_migrate)
+def install_title_search(sender, using, **kwargs):
+    # SQLite пересоздаёт таблицу при изменении её полей в миграции,
+    # и триггеры индекса удаляются вместе со старой таблицей.
+    connection = connections[using]
+    if sender.name != 'reviews' or not search.is_supported(connection):
+        return
+    if search.install(connection):
+        search.rebuild(connection)
@@ -32,4 +32,5 @@ assert get_version() < '4.0.0', 'Пожалуйста, используйте в
 
 pytest_plugins = [
     'tests.fixtures.fixture_user',
+    'tests.fixtures.fixture_data',
 ]
@@ -0,0 +1,84 @@
+import pytest
+from django.core.cache import cache
+
+
+def reset_process_caches():
+    from api.authentication import decoded_tokens, user_states
+    from reviews.autocomplete import category_names, genre_names, title_names
+    from reviews.catalog import categories, genres
+
+    cache.clear()
+    genres.invalidate()
+    categories.invalidate()
+    for index in (genre_names, category_names, title_names):
+        index.invalidate()
+    decoded_tokens.clear()
+    user_states.clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Кэши не должны переживать очистку базы между тестами."""
+    reset_process_caches()
+    yield
+    reset_process_caches()
+
+
+@pytest.fixture
+def populate_api(django_user_model):
+    """
+    Наполняет базу до `size` произведений, отзывов к первому
+    произведению и комментариев к первому отзыву.
+    Повторный вызов с большим `size` дозаполняет те же объекты.
+    """
+    from reviews.models import Category, Comment, Genre, Review, Title
+
+    def populate(size):
+        categories = [
+            Category.objects.get_or_create(
+                slug=f'category-{idx}', defaults={'name': f'Категория {idx}'}
+            )[0]
+            for idx in range(2)
+        ]
+        genres = [
+            Genre.objects.get_or_create(
+                slug=f'genre-{idx}', defaults={'name': f'Жанр {idx}'}
+            )[0]
+            for idx in range(3)
+        ]
+        for idx in range(Title.objects.count(), size):
+            title = Title.objects.create(
+                name=f'Произведение {idx}',
+                year=2000 + idx,
+                description='Описание',
+                category=categories[idx % len(categories)],
+            )
+            title.genre.set(genres)
+
+        title = Title.objects.order_by('id').first()
+        authors = []
+        for idx in range(size):
+            author, _ = django_user_model.objects.get_or_create(
+                username=f'populate_user_{idx}',
+                defaults={'email': f'populate_user_{idx}@yamdb.fake'},
+            )
+            authors.append(author)
+        for author in authors[title.reviews.count():]:
+            Review.objects.create(
+                title=title, author=author, text='Отзыв', score=7
+            )
+
+        review = title.reviews.order_by('id').first()
+        for author in authors[review.comments.count():]:
+            Comment.objects.create(review=review, author=author, text='Ок')
+
+        return {
+            'title_id': title.id,
+            'review_id': review.id,
+            'comment_id': review.comments.order_by('id').first().id,
+            'genre_slug': genres[0].slug,
+            'category_slug': categories[0].slug,
+            'username': authors[0].username,
+        }
+
+    return populate
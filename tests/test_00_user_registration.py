@@ -1,7 +1,10 @@
 from http import HTTPStatus
 
 import pytest
+from unittest import mock
+
 from django.core import mail
+from django.core.management import call_command
 from django.db.utils import IntegrityError
 
 from tests.utils import (invalid_data_for_user_patch_and_creation,
@@ -110,6 +113,11 @@ class Test00UserRegistration:
         }
 
         response = client.post(self.url_signup, data=valid_data)
+        assert len(mail.outbox) == outbox_before_count, (
+            'Письмо с кодом подтверждения должно ставиться в очередь, '
+            'а не отправляться во время запроса.'
+        )
+        call_command('sendemails', '--once', stdout=mock.MagicMock())
         outbox_after = mail.outbox  # email outbox after user create
 
         assert response.status_code != HTTPStatus.NOT_FOUND, (
@@ -373,3 +381,39 @@ class Test00UserRegistration:
             'пользователя, созданного администратором,  возвращает ответ '
             'со статусом 200.'
         )
+
+    def test_sendemails_retries_failed_email(self, client):
+        from reviews.models import OutgoingEmail
+
+        valid_data = {
+            'email': 'retry@yamdb.fake',
+            'username': 'retry_username'
+        }
+        client.post(self.url_signup, data=valid_data)
+        assert OutgoingEmail.objects.filter(
+            recipient=valid_data['email']
+        ).exists(), (
+            f'POST-запрос к `{self.url_signup}` с корректными данными '
+            'должен поставить письмо с кодом подтверждения в очередь.'
+        )
+
+        with mock.patch(
+            'django.core.mail.backends.locmem.EmailBackend.send_messages',
+            side_effect=ConnectionError,
+        ):
+            call_command('sendemails', '--once', stdout=mock.MagicMock())
+        email = OutgoingEmail.objects.get(recipient=valid_data['email'])
+        assert email.attempts == 1 and email.last_error, (
+            'Неотправленное письмо должно остаться в очереди '
+            'с отметкой о неудачной попытке.'
+        )
+
+        outbox_before_count = len(mail.outbox)
+        OutgoingEmail.objects.update(next_attempt=email.created)
+        call_command('sendemails', '--once', stdout=mock.MagicMock())
+        assert len(mail.outbox) == outbox_before_count + 1, (
+            'Письмо должно быть отправлено при повторной попытке.'
+        )
+        assert not OutgoingEmail.objects.exists(), (
+            'Отправленное письмо должно удаляться из очереди.'
+        )
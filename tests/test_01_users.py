@@ -1,8 +1,9 @@
 from http import HTTPStatus
 
 import pytest
+from rest_framework.test import APIClient
 
-from tests.utils import (check_pagination,
+from tests.utils import (check_pagination, count_queries,
                          invalid_data_for_user_patch_and_creation)
 
 
@@ -552,3 +553,94 @@ class Test01UserAPI:
             'Проверьте, что PATCH-запрос к `/api/v1/users/me/` с ключом '
             '`role` не изменяет роль пользователя.'
         )
+
+    def test_11_token_role_claims(self, client, admin_client,
+                                  django_user_model):
+        data = {'username': 'claims_user', 'email': 'claims@yamdb.fake'}
+        client.post('/api/v1/auth/signup/', data=data)
+        user = django_user_model.objects.get(username=data['username'])
+        user.role = 'admin'
+        user.save()
+        response = client.post('/api/v1/auth/token/', data={
+            'username': user.username,
+            'confirmation_code': user.confirmation_code,
+        })
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что POST-запрос к `/api/v1/auth/token/` с верным '
+            'кодом подтверждения возвращает ответ со статусом 200.'
+        )
+        token = response.json().replace('token: ', '')
+        claims_client = APIClient()
+        claims_client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+        claims_client.get('/api/v1/users/me/')
+        response, count = count_queries(claims_client, '/api/v1/users/me/')
+        assert response.json()['username'] == user.username
+        assert count == 1, (
+            'Проверьте, что роль пользователя с токеном запоминается и не '
+            'запрашивается из базы на каждый запрос.'
+        )
+        response, count = count_queries(claims_client, '/api/v1/users/')
+        assert response.status_code == HTTPStatus.OK
+        assert count == 2, (
+            'Проверьте, что для проверки прав администратора не нужен '
+            'запрос пользователя из базы.'
+        )
+
+        admin_client.patch(
+            f'/api/v1/users/{user.username}/', data={'role': 'user'}
+        )
+        response = claims_client.get('/api/v1/users/')
+        assert response.status_code == HTTPStatus.FORBIDDEN, (
+            'Проверьте, что после смены роли через `/api/v1/users/` старые '
+            'токены пользователя теряют права прежней роли.'
+        )
+
+    def test_12_token_revocation(self, admin, admin_client, settings):
+        from django.core.cache import cache
+
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        from api.authentication import user_states
+
+        token = AccessToken.for_user(admin)
+        token_client = APIClient()
+        token_client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        url = '/api/v1/users/'
+        assert token_client.get(url).status_code == HTTPStatus.OK
+
+        admin.role = 'user'
+        admin.save()
+        cache.clear()
+        for idx in range(50):
+            token_client.get(f'/api/v1/genres/?x={idx}')
+        assert token_client.get(url).status_code == HTTPStatus.FORBIDDEN, (
+            'Проверьте, что смена роли действует на выданные токены и после '
+            'вытеснения записей из кэша.'
+        )
+        user_states.clear()
+        assert token_client.get(url).status_code == HTTPStatus.FORBIDDEN
+
+        # Изменение в обход save() другой процесс увидит по таймауту.
+        type(admin).objects.filter(pk=admin.pk).update(role='admin')
+        settings.JWT_AUTH_CACHE_TIMEOUT = 0
+        assert token_client.get(url).status_code == HTTPStatus.OK
+
+        type(admin).objects.filter(pk=admin.pk).update(is_active=False)
+        response = token_client.get(url)
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что токен заблокированного пользователя не '
+            'принимается.'
+        )
+
+        settings.JWT_AUTH_CACHE_TIMEOUT = 30
+        admin.refresh_from_db()
+        admin.is_active = True
+        admin.save()
+        assert token_client.get(url).status_code == HTTPStatus.OK
+        admin.is_active = False
+        admin.save()
+        assert token_client.get(url).status_code == HTTPStatus.UNAUTHORIZED
+
+        admin.delete()
+        assert token_client.get(url).status_code == HTTPStatus.UNAUTHORIZED
@@ -2,8 +2,12 @@ from http import HTTPStatus
 
 import pytest
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
 from tests.utils import (check_pagination, check_permissions,
-                         create_categories, create_genre, create_titles)
+                         count_queries, create_categories, create_genre,
+                         create_titles)
 
 
 @pytest.mark.django_db(transaction=True)
@@ -316,3 +320,578 @@ class Test04TitleAPI:
                           HTTPStatus.FORBIDDEN)
         check_permissions(moderator_client, url, data, 'модератора',
                           titles, HTTPStatus.FORBIDDEN)
+
+    def test_06_titles_ordering(self, client, admin_client, user_client):
+        titles, _, _ = create_titles(admin_client)
+        url = '/api/v1/titles/'
+        user_client.post(
+            f'{url}{titles[1]["id"]}/reviews/', data={'text': 'ok', 'score': 8}
+        )
+        user_client.post(
+            f'{url}{titles[0]["id"]}/reviews/', data={'text': 'ok', 'score': 3}
+        )
+
+        for ordering, expected in (
+            ('-rating', [titles[1]['id'], titles[0]['id']]),
+            ('rating', [titles[0]['id'], titles[1]['id']]),
+            ('-year', [titles[1]['id'], titles[0]['id']]),
+            ('name', [titles[1]['id'], titles[0]['id']]),
+        ):
+            for extra in ('', '&cursor='):
+                response = client.get(f'{url}?ordering={ordering}{extra}')
+                assert response.status_code == HTTPStatus.OK, (
+                    f'Проверьте, что GET-запрос к `{url}?ordering={ordering}` '
+                    'возвращает ответ со статусом 200.'
+                )
+                result_ids = [
+                    title['id'] for title in response.json()['results']
+                ]
+                assert result_ids == expected, (
+                    f'Проверьте, что для эндпоинта `{url}` реализована '
+                    f'сортировка `?ordering={ordering}`.'
+                )
+
+    def test_07_titles_list_query_count(self, client, admin_client,
+                                        django_assert_num_queries):
+        _, categories, genres = create_titles(admin_client)
+        url = '/api/v1/titles/'
+        for idx in range(6):
+            admin_client.post(url, data={
+                'name': f'Произведение {idx}',
+                'year': 2000 + idx,
+                'genre': [genre['slug'] for genre in genres],
+                'category': categories[idx % 2]['slug'],
+            })
+
+        # Версии для ETag, COUNT для пагинации,
+        # страница произведений с категориями, жанры.
+        with django_assert_num_queries(4):
+            response = client.get(url)
+        assert len(response.json()['results']) == 5
+        with django_assert_num_queries(3):
+            response = client.get(f'{url}?cursor=')
+        with django_assert_num_queries(3):
+            client.get(f'{url}{response.json()["results"][0]["id"]}/')
+
+    def test_08_titles_conditional_get(self, client, admin_client,
+                                       user_client):
+        titles, _, genres = create_titles(admin_client)
+        url = '/api/v1/titles/'
+
+        response = client.get(url)
+        etag = response.get('ETag')
+        assert etag and response.get('Last-Modified'), (
+            f'Проверьте, что ответ на GET-запрос к `{url}` содержит '
+            'заголовки `ETag` и `Last-Modified`.'
+        )
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            f'Проверьте, что GET-запрос к `{url}` с актуальным `ETag` '
+            'возвращает ответ со статусом 304.'
+        )
+        assert not response.content
+
+        user_client.post(
+            f'{url}{titles[0]["id"]}/reviews/', data={'text': 'ok', 'score': 8}
+        )
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что после нового отзыва GET-запрос к `{url}` со '
+            'старым `ETag` возвращает обновлённые данные.'
+        )
+        etag = response['ETag']
+
+        admin_client.delete(f'/api/v1/genres/{genres[0]["slug"]}/')
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что после удаления жанра GET-запрос к `{url}` со '
+            'старым `ETag` возвращает обновлённые данные.'
+        )
+
+    def test_09_titles_anonymous_cache(self, client, admin_client,
+                                       user_client,
+                                       django_assert_num_queries):
+        titles, _, _ = create_titles(admin_client)
+        url = '/api/v1/titles/'
+        detail_url = f'{url}{titles[1]["id"]}/'
+        data = client.get(url).json()
+        client.get(detail_url)
+
+        # Из базы читаются только версии моделей для ETag.
+        with django_assert_num_queries(1):
+            assert client.get(url).json() == data, (
+                f'Проверьте, что повторный GET-запрос к `{url}` отдаёт '
+                'сохранённый в кэше ответ.'
+            )
+        with django_assert_num_queries(1):
+            client.get(detail_url)
+
+        user_client.post(
+            f'{url}{titles[0]["id"]}/reviews/', data={'text': 'ok', 'score': 8}
+        )
+        with django_assert_num_queries(1):
+            client.get(detail_url)
+        ratings = {
+            title['id']: title['rating'] for title in client.get(url).json()[
+                'results'
+            ]
+        }
+        assert ratings[titles[0]['id']] == 8, (
+            f'Проверьте, что новый отзыв сбрасывает кэш ответов `{url}`.'
+        )
+
+    def test_10_titles_catalog_lookups(self, client, admin_client):
+        _, categories, genres = create_titles(admin_client)
+        url = '/api/v1/titles/'
+
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.post(url, data={
+                'name': 'Чужой',
+                'year': 1979,
+                'genre': [genres[0]['slug'], genres[2]['slug']],
+                'category': categories[0]['slug'],
+            })
+        slug_queries = [
+            query['sql'] for query in context.captured_queries
+            if '"slug" =' in query['sql'] or '"slug" IN' in query['sql']
+        ]
+        assert response.status_code == HTTPStatus.CREATED
+        assert not slug_queries, (
+            'Жанры и категории по слагу должны искаться в справочнике в '
+            'памяти процесса, а не запросами к базе.'
+        )
+
+        with CaptureQueriesContext(connection) as context:
+            admin_client.get(f'{url}?genre=rror&category=film')
+            admin_client.get(f'{url}{response.json()["id"]}/')
+        catalog_queries = [
+            query['sql'] for query in context.captured_queries
+            if '"reviews_genre"' in query['sql']
+            or '"reviews_category"' in query['sql']
+        ]
+        assert not catalog_queries, (
+            'Жанры и категории для фильтрации и вывода произведений должны '
+            'браться из справочника в памяти процесса.'
+        )
+
+        response = admin_client.get(f'{url}?genre=rror&category=film')
+        assert len(response.json()['results']) == 2, (
+            f'Проверьте, что для эндпоинта `{url}` работает фильтрация по '
+            'части слага жанра и категории.'
+        )
+
+    def test_11_titles_many_genres_query_count(self, admin_client):
+        from reviews.models import Genre
+
+        categories = create_categories(admin_client)
+        genres = [
+            Genre.objects.create(name=f'Жанр {idx}', slug=f'genre-{idx}')
+            for idx in range(20)
+        ]
+        url = '/api/v1/titles/'
+
+        query_counts = []
+        for idx, genre_count in enumerate((2, 2, 20)):
+            response, count = count_queries(admin_client, url, 'post', {
+                'name': f'Сборник {idx}',
+                'year': 2000,
+                'genre': [genre.slug for genre in genres[:genre_count]],
+                'category': categories[0]['slug'],
+            })
+            assert response.status_code == HTTPStatus.CREATED
+            query_counts.append(count)
+        # Первый запрос загружает справочники жанров и категорий.
+        assert query_counts[1] == query_counts[2], (
+            f'Проверьте, что POST-запрос к `{url}` проверяет жанры '
+            'произведения фиксированным числом запросов к базе.'
+        )
+
+        response = admin_client.post(url, data={
+            'name': 'Сборник',
+            'year': 2000,
+            'genre': [genres[0].slug, 'unknown-genre'],
+            'category': categories[0]['slug'],
+        })
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert 'genre' in response.json()
+
+    def test_12_titles_ndjson_export(self, client, admin_client, user_client,
+                                     populate_api, settings):
+        import json
+
+        settings.EXPORT_CHUNK_SIZE = 5
+        url = '/api/v1/titles/export/'
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            f'Проверьте, что GET-запрос к `{url}` без токена возвращает '
+            'ответ со статусом 401.'
+        )
+
+        query_counts = []
+        for size in (6, 16):
+            populate_api(size)
+            b''.join(user_client.get(url).streaming_content)
+            with CaptureQueriesContext(connection) as context:
+                response = user_client.get(url)
+                lines = b''.join(response.streaming_content).splitlines()
+            query_counts.append(len(context.captured_queries))
+            assert response.status_code == HTTPStatus.OK
+            assert response['Content-Type'] == 'application/x-ndjson'
+            titles = [json.loads(line) for line in lines]
+            ids = [title['id'] for title in titles]
+            assert ids == sorted(ids)
+            assert len(titles) == size, (
+                f'GET-запрос к `{url}` должен одним ответом вернуть все '
+                'произведения, по одному в строке.'
+            )
+            assert set(titles[0]) == {
+                'id', 'name', 'year', 'rating', 'description', 'genre',
+                'category'
+            }
+        # Каждая пачка по 5 произведений - запрос к ним и к их жанрам.
+        assert query_counts[1] - query_counts[0] == 2 * 2, (
+            f'Проверьте, что `{url}` читает произведения из базы пачками.'
+        )
+
+    def test_13_titles_sparse_fields(self, client, populate_api):
+        populate_api(3)
+        url = '/api/v1/titles/?fields=id,name,rating'
+
+        client.get(url)
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url.replace('titles/', 'titles/export/'))
+            response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        assert all(
+            set(title) == {'id', 'name', 'rating'}
+            for title in response.json()['results']
+        ), (
+            f'Проверьте, что GET-запрос к `{url}` возвращает только поля '
+            'из параметра `fields`.'
+        )
+        sql = ' '.join(query['sql'] for query in context.captured_queries)
+        assert '"description"' not in sql and 'title_genres' not in sql, (
+            f'GET-запрос к `{url}` не должен загружать из базы описание и '
+            'жанры произведений.'
+        )
+
+        title_id = response.json()['results'][0]['id']
+        response = client.get(f'/api/v1/titles/{title_id}/?fields=genre')
+        assert set(response.json()) == {'genre'}
+        assert len(response.json()['genre']) == 3
+
+        populate_api(8)
+        for ordering in ('-rating', 'year', 'name'):
+            url = f'/api/v1/titles/?ordering={ordering}&cursor='
+            _, full_count = count_queries(client, url)
+            response, sparse_count = count_queries(
+                client, f'{url}&fields=id,name'
+            )
+            assert response.status_code == HTTPStatus.OK
+            assert sparse_count <= full_count, (
+                'Проверьте, что с параметром `fields` поля сортировки '
+                '`ordering` загружаются вместе с произведениями, а не '
+                'отдельным запросом на каждое.'
+            )
+
+        response = client.get('/api/v1/titles/?fields=id,unknown')
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Неизвестное поле в параметре `fields` должно возвращать ответ '
+            'со статусом 400.'
+        )
+        assert 'fields' in response.json()
+
+    def test_14_titles_batch(self, client, populate_api, settings):
+        from reviews.models import Title
+
+        populate_api(6)
+        ids = list(Title.objects.order_by('id').values_list('id', flat=True))
+        url = '/api/v1/titles/batch/'
+
+        client.get(f'{url}?ids={ids[0]}')
+        query_counts = []
+        for requested in (ids[:2], ids):
+            query = ','.join(map(str, reversed(requested)))
+            response, count = count_queries(client, f'{url}?ids={query},999')
+            query_counts.append(count)
+            assert response.status_code == HTTPStatus.OK, (
+                f'Проверьте, что GET-запрос к `{url}?ids=` возвращает ответ '
+                'со статусом 200.'
+            )
+            data = response.json()
+            assert [title['id'] for title in data] == requested[::-1], (
+                f'GET-запрос к `{url}` должен вернуть найденные произведения '
+                'в порядке id из запроса.'
+            )
+            assert {'rating', 'genre', 'category'} <= set(data[0])
+        assert query_counts[0] == query_counts[1], (
+            f'Число SQL-запросов к `{url}` не должно зависеть от числа id.'
+        )
+
+        response = client.get(f'{url}?ids={ids[0]}&fields=id,name')
+        assert set(response.json()[0]) == {'id', 'name'}
+
+        settings.TITLES_BATCH_SIZE = 3
+        for query in ('', '?ids=', '?ids=1,a', '?ids=1,2,3,4'):
+            response = client.get(url + query)
+            assert response.status_code == HTTPStatus.BAD_REQUEST, (
+                f'GET-запрос к `{url}{query}` должен возвращать ответ '
+                'со статусом 400.'
+            )
+            assert 'ids' in response.json()
+
+    def test_15_titles_bulk(self, client, admin_client, user_client,
+                            settings):
+        from reviews.models import Title, TitleGenre
+
+        genres = create_genre(admin_client)
+        categories = create_categories(admin_client)
+        url = '/api/v1/titles/bulk/'
+        items = [
+            {
+                'name': f'Сезон {idx}',
+                'year': 2000 + idx,
+                'genre': [genre['slug'] for genre in genres[:idx % 3 + 1]],
+                'category': categories[idx % 2]['slug'],
+            }
+            for idx in range(10)
+        ]
+
+        for response in (
+            client.post(url, data=items, content_type='application/json'),
+            user_client.post(url, data=items, format='json'),
+        ):
+            assert response.status_code in (
+                HTTPStatus.UNAUTHORIZED, HTTPStatus.FORBIDDEN
+            ), (
+                f'Проверьте, что POST-запрос к `{url}` доступен только '
+                'администратору.'
+            )
+
+        # Первый запрос загружает справочники жанров и категорий.
+        admin_client.post(url, data=items[:1], format='json')
+        query_counts = []
+        for size in (2, 10):
+            with CaptureQueriesContext(connection) as context:
+                response = admin_client.post(
+                    url, data=items[:size], format='json'
+                )
+            query_counts.append(len(context.captured_queries))
+            assert response.status_code == HTTPStatus.CREATED, (
+                f'Проверьте, что POST-запрос администратора к `{url}` со '
+                'списком произведений возвращает ответ со статусом 201.'
+            )
+            data = response.json()
+            assert [title['name'] for title in data] == [
+                item['name'] for item in items[:size]
+            ]
+            assert [len(title['genre']) for title in data] == [
+                len(item['genre']) for item in items[:size]
+            ]
+        assert query_counts[0] == query_counts[1], (
+            f'Число SQL-запросов к `{url}` не должно зависеть от числа '
+            'произведений в списке.'
+        )
+        assert Title.objects.count() == 13
+        assert TitleGenre.objects.count() == 1 + 3 + 19
+
+        response = admin_client.post(url, data=[
+            items[0],
+            {**items[1], 'genre': ['unknown-genre']},
+            {'name': 'Без года'},
+        ], format='json')
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        errors = response.json()
+        assert len(errors) == 3 and errors[0] == {}, (
+            f'Ошибки POST-запроса к `{url}` должны возвращаться списком '
+            'по каждому произведению.'
+        )
+        assert 'genre' in errors[1] and 'year' in errors[2]
+        assert Title.objects.count() == 13, (
+            f'Если в списке для `{url}` есть ошибки, ни одно произведение '
+            'не должно быть записано.'
+        )
+
+        first, second = data[:2]
+        response = admin_client.patch(url, data=[
+            {'id': first['id'], 'name': 'Новое название'},
+            {'id': second['id'], 'genre': [genres[2]['slug']]},
+        ], format='json')
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что PATCH-запрос администратора к `{url}` '
+            'возвращает ответ со статусом 200.'
+        )
+        data = response.json()
+        assert data[0]['name'] == 'Новое название'
+        assert data[0]['genre'] == first['genre']
+        assert [genre['slug'] for genre in data[1]['genre']] == [
+            genres[2]['slug']
+        ]
+        assert data[1]['name'] == second['name']
+
+        response = admin_client.patch(url, data=[
+            {'id': first['id'], 'year': 2000},
+            {'id': 999999, 'name': 'Нет такого'},
+        ], format='json')
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert response.json()[0] == {} and 'id' in response.json()[1]
+
+        settings.TITLES_BULK_SIZE = 3
+        for payload in ([], {'name': 'Не список'}, items[:4]):
+            response = admin_client.post(
+                url, data=payload, format='json'
+            )
+            assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_16_titles_full_text_search(self, client, admin_client):
+        from io import StringIO
+
+        from django.core.management import call_command
+
+        genres = create_genre(admin_client)
+        categories = create_categories(admin_client)
+        url = '/api/v1/titles/'
+        response = admin_client.post(f'{url}bulk/', data=[
+            {
+                'name': name,
+                'year': 2000,
+                'description': description,
+                'genre': [genres[0]['slug']],
+                'category': categories[0]['slug'],
+            }
+            for name, description in (
+                ('Тихий Дон', 'Роман о казаках'),
+                ('Ёлки', 'Новогодняя комедия о казаке'),
+                ('Казаки', 'Повесть'),
+                ('Война и мир', 'Роман-эпопея'),
+            )
+        ], format='json')
+        assert response.status_code == HTTPStatus.CREATED
+        ids = {title['name']: title['id'] for title in response.json()}
+
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(f'{url}?search=казак')
+        assert response.status_code == HTTPStatus.OK
+        names = [title['name'] for title in response.json()['results']]
+        assert names[0] == 'Казаки' and set(names) == {
+            'Казаки', 'Тихий Дон', 'Ёлки'
+        }, (
+            f'Проверьте, что `{url}?search=` ищет по началу слов в названии '
+            'и описании, а совпадения в названии идут первыми.'
+        )
+        sql = ' '.join(query['sql'] for query in context.captured_queries)
+        assert 'MATCH' in sql and 'LIKE' not in sql, (
+            f'Поиск `{url}?search=` должен идти по полнотекстовому индексу.'
+        )
+
+        response = client.get(f'{url}?search=елки&ordering=name')
+        assert [title['name'] for title in response.json()['results']] == [
+            'Ёлки'
+        ]
+        response = client.get(f'{url}?search=казак&cursor=')
+        assert [
+            title['name'] for title in response.json()['results']
+        ] == names
+        response = client.get(f'{url}?search=казак&fields=name&cursor=')
+        assert [
+            title['name'] for title in response.json()['results']
+        ] == names
+        response = client.get(f'{url}?search=роман&ordering=-name')
+        assert [title['name'] for title in response.json()['results']] == [
+            'Тихий Дон', 'Война и мир'
+        ]
+        assert client.get(f'{url}?search=*"').json()['results'] == []
+
+        admin_client.patch(
+            f'{url}{ids["Война и мир"]}/', data={'name': 'Казачья война'}
+        )
+        admin_client.delete(f'{url}{ids["Казаки"]}/')
+        response = client.get(f'{url}?search=казач')
+        assert [title['name'] for title in response.json()['results']] == [
+            'Казачья война'
+        ], (
+            'Проверьте, что индекс поиска обновляется при изменении и '
+            'удалении произведений.'
+        )
+
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM title_search')
+        assert client.get(f'{url}?search=дон').json()['results'] == []
+        call_command('rebuildsearch', stdout=StringIO())
+        response = client.get(f'{url}?search=дон')
+        assert [title['name'] for title in response.json()['results']] == [
+            'Тихий Дон'
+        ]
+
+    def test_17_titles_bulk_without_sqlite(self, admin_client, monkeypatch):
+        from reviews.models import TitleGenre
+
+        genres = create_genre(admin_client)
+        categories = create_categories(admin_client)
+        # Бэкенд без RETURNING и без единственного писателя.
+        monkeypatch.setattr(connection, 'vendor', 'other')
+        response = admin_client.post('/api/v1/titles/bulk/', data=[
+            {
+                'name': f'Сезон {idx}',
+                'year': 2000,
+                'genre': [genres[idx]['slug']],
+                'category': categories[0]['slug'],
+            }
+            for idx in range(3)
+        ], format='json')
+        assert response.status_code == HTTPStatus.CREATED
+        links = {
+            (link.title.name, link.genre.slug)
+            for link in TitleGenre.objects.select_related('title', 'genre')
+        }
+        assert links == {
+            (f'Сезон {idx}', genres[idx]['slug']) for idx in range(3)
+        }
+
+    def test_18_titles_keyset_cursor(self, client):
+        from reviews.models import Title
+
+        Title.objects.bulk_create(
+            Title(name=f'Fable {idx // 4}', year=2000, description='Fable')
+            for idx in range(12)
+        )
+        url = '/api/v1/titles/'
+        for query, key in (
+            ('ordering=-rating', lambda title: (-title.rating_avg, -title.id)),
+            ('ordering=year', lambda title: (title.year, title.id)),
+            ('ordering=-name', lambda title: (title.name, title.id)),
+            ('search=fable', lambda title: (title.id,)),
+        ):
+            expected = [title.id for title in sorted(
+                Title.objects.all(), key=key,
+                reverse=query == 'ordering=-name',
+            )]
+            seen = []
+            next_url = f'{url}?{query}&cursor='
+            with CaptureQueriesContext(connection) as context:
+                while next_url:
+                    response = client.get(next_url)
+                    assert response.status_code == HTTPStatus.OK
+                    seen += [title['id'] for title in response.json()['results']]
+                    previous_url = response.json()['previous']
+                    next_url = response.json()['next']
+            assert seen == expected, (
+                f'Проверьте, что курсор `{url}?{query}` обходит все '
+                'произведения с одинаковыми значениями сортировки по одному '
+                'разу и по порядку.'
+            )
+            sql = ' '.join(query['sql'] for query in context.captured_queries)
+            assert 'OFFSET' not in sql, (
+                f'Курсор `{url}?{query}` должен выбирать следующие страницы '
+                'по значениям сортировки и id, без OFFSET.'
+            )
+            response = client.get(previous_url)
+            assert [
+                title['id'] for title in response.json()['results']
+            ] == expected[5:10], (
+                f'Проверьте, что ссылка `previous` курсора `{url}?{query}` '
+                'ведёт на предыдущую страницу.'
+            )
+
+        response = client.get(f'{url}?ordering=year&cursor=cD0lNUIxJTVE')
+        assert response.status_code == HTTPStatus.NOT_FOUND
@@ -384,3 +384,236 @@ class Test05ReviewAPI:
                 f'Проверьте, что DELETE-запрос {role} к чужому отзыву через '
                 f'`{url_template}` удаляет отзыв.'
             )
+
+    def test_06_review_rating_follows_changes(self, admin_client, admin,
+                                              user_client, user,
+                                              moderator_client, moderator):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        url_template = '/api/v1/titles/{title_id}/reviews/{review_id}/'
+        reviews, titles = create_reviews(admin_client, author_map)
+        title_url = f'/api/v1/titles/{titles[0]["id"]}/'
+
+        response = admin_client.get(title_url)
+        assert response.json().get('rating') == 5, (
+            'Проверьте, что рейтинг произведения учитывает созданные отзывы.'
+        )
+
+        response = user_client.patch(
+            url_template.format(
+                title_id=titles[0]['id'], review_id=reviews[1]['id']
+            ),
+            data={'score': 2}
+        )
+        assert response.status_code == HTTPStatus.OK
+        response = admin_client.get(title_url)
+        assert response.json().get('rating') == 4, (
+            'Проверьте, что рейтинг произведения пересчитывается после '
+            'изменения оценки в отзыве.'
+        )
+
+        for review in reviews:
+            response = admin_client.delete(
+                url_template.format(
+                    title_id=titles[0]['id'], review_id=review['id']
+                )
+            )
+            assert response.status_code == HTTPStatus.NO_CONTENT
+        response = admin_client.get(title_url)
+        assert response.json().get('rating') is None, (
+            'Проверьте, что после удаления всех отзывов рейтинг произведения '
+            'становится равным `None`.'
+        )
+
+    def test_07_review_score_distribution(self, client, admin_client, admin,
+                                          user_client, user,
+                                          moderator_client, moderator):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        reviews, titles = create_reviews(admin_client, author_map)
+        url = f'/api/v1/titles/{titles[0]["id"]}/scores/'
+        user_client.patch(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[1]["id"]}/',
+            data={'score': 7}
+        )
+
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{url}` возвращает ответ со '
+            'статусом 200.'
+        )
+        counts = {item['score']: item['count'] for item in response.json()}
+        assert counts == {
+            score: {5: 2, 7: 1}.get(score, 0) for score in range(0, 11)
+        }, (
+            f'Проверьте, что ответ на GET-запрос к `{url}` содержит '
+            'количество отзывов для каждой оценки.'
+        )
+
+        response = client.get('/api/v1/titles/999/scores/')
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    def test_08_review_cursor_pagination(self, client, admin_client, admin,
+                                         user_client, user,
+                                         moderator_client, moderator):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        _, titles = create_reviews(admin_client, author_map)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+
+        page_data = client.get(url).json()
+        response = client.get(f'{url}?cursor=')
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{url}?cursor=` возвращает ответ '
+            'со статусом 200.'
+        )
+        cursor_data = response.json()
+        assert 'count' not in cursor_data and 'next' in cursor_data, (
+            f'Проверьте, что для эндпоинта `{url}` доступна пагинация по '
+            'курсору.'
+        )
+        assert cursor_data['results'] == page_data['results'], (
+            'Проверьте, что пагинация по курсору сохраняет порядок отзывов.'
+        )
+
+    def test_09_review_ndjson_export(self, client, user_client, populate_api,
+                                     settings):
+        import json
+
+        settings.EXPORT_CHUNK_SIZE = 3
+        ids = populate_api(8)
+        url = f'/api/v1/titles/{ids["title_id"]}/reviews/export/'
+
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            f'Проверьте, что GET-запрос к `{url}` без токена возвращает '
+            'ответ со статусом 401.'
+        )
+
+        response = user_client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        assert response['Content-Type'] == 'application/x-ndjson'
+        reviews = [
+            json.loads(line)
+            for line in b''.join(response.streaming_content).splitlines()
+        ]
+        assert len(reviews) == 8, (
+            f'GET-запрос к `{url}` должен одним ответом вернуть все отзывы '
+            'на произведение, по одному в строке.'
+        )
+        assert reviews[0]['author'] == 'populate_user_0'
+        assert {'id', 'text', 'author', 'score', 'pub_date'} <= set(
+            reviews[0]
+        ), f'Проверьте поля отзывов в ответе на GET-запрос к `{url}`.'
+
+        response = user_client.get('/api/v1/titles/999/reviews/export/')
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Выгрузка отзывов несуществующего произведения должна '
+            'возвращать ответ со статусом 404.'
+        )
+
+    def test_10_review_sparse_fields(self, client, populate_api):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        ids = populate_api(3)
+        url = f'/api/v1/titles/{ids["title_id"]}/reviews/'
+
+        for query_string in ('?fields=id,score', '?fields=id,score&cursor='):
+            with CaptureQueriesContext(connection) as context:
+                response = client.get(url + query_string)
+            assert response.status_code == HTTPStatus.OK
+            results = response.json()['results']
+            assert results and all(
+                set(review) == {'id', 'score'} for review in results
+            ), (
+                f'Проверьте, что GET-запрос к `{url}{query_string}` '
+                'возвращает только поля из параметра `fields`.'
+            )
+            sql = ' '.join(query['sql'] for query in context.captured_queries)
+            assert 'reviews_user' not in sql and '"text"' not in sql, (
+                f'GET-запрос к `{url}{query_string}` не должен загружать '
+                'авторов и тексты отзывов.'
+            )
+
+        response = client.get(f'{url}{ids["review_id"]}/?fields=author')
+        assert response.json() == {'author': 'populate_user_0'}
+
+    def test_11_review_conditional_get(self, client, admin_client,
+                                       user_client, populate_api):
+        ids = populate_api(3)
+        url = f'/api/v1/titles/{ids["title_id"]}/reviews/'
+
+        for api_client in (client, user_client):
+            response = api_client.get(url)
+            assert response.status_code == HTTPStatus.OK
+            etag = response['ETag']
+            response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+                f'Проверьте, что GET-запрос к `{url}` с актуальным `ETag` '
+                'возвращает ответ со статусом 304.'
+            )
+            assert not response.content
+
+        admin_client.delete(f'{url}{ids["review_id"]}/')
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK
+
+    def test_12_review_rating_stale_object(self, populate_api):
+        from reviews.models import Review, Title, TitleScore
+
+        ids = populate_api(2)
+        first = Review.objects.get(pk=ids['review_id'])
+        stale = Review.objects.get(pk=ids['review_id'])
+        first.score = 2
+        first.save()
+        stale.score = 4
+        stale.save()
+
+        title = Title.objects.get(pk=ids['title_id'])
+        assert (title.rating_sum, title.rating_count) == (11, 2), (
+            'Проверьте, что при сохранении отзыва рейтинг пересчитывается '
+            'от оценки из базы, а не от устаревшей оценки в памяти.'
+        )
+        counts = dict(
+            TitleScore.objects.filter(title=title, count__gt=0)
+            .values_list('score', 'count')
+        )
+        assert counts == {4: 1, 7: 1}
+
+        first.delete()
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count) == (7, 1), (
+            'Проверьте, что при удалении отзыва из рейтинга вычитается '
+            'оценка из базы.'
+        )
+
+    def test_13_review_cache_unknown_title(self, client, populate_api):
+        from api.cache import GENERATION_KEY, get_cache
+
+        ids = populate_api(1)
+        url = '/api/v1/titles/999/reviews/'
+        for _ in range(2):
+            response = client.get(url)
+            assert response.status_code == HTTPStatus.NOT_FOUND, (
+                f'Проверьте, что GET-запрос к `{url}` для несуществующего '
+                'произведения возвращает ответ со статусом 404 и пустая '
+                'страница не попадает в кэш.'
+            )
+        assert get_cache().get(GENERATION_KEY.format('reviews:999')) is None, (
+            f'GET-запрос к `{url}` не должен создавать ключи в кэше.'
+        )
+        response = client.get(
+            f'/api/v1/titles/{ids["title_id"]}/reviews/999/comments/'
+        )
+        assert response.status_code == HTTPStatus.NOT_FOUND
+        assert get_cache().get(GENERATION_KEY.format('comments:999')) is None
@@ -381,3 +381,73 @@ class Test06CommentAPI:
             'Проверьте, что DELETE-запрос неавторизованного пользователя к '
             f'`{url}` возвращает ответ со статусом 401.'
         )
+
+    def test_07_comment_cursor_pagination(self, admin_client, admin, client,
+                                          user_client, user,
+                                          moderator_client, moderator):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        _, reviews, titles = create_comments(admin_client, author_map)
+        url = (
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+            f'{reviews[0]["id"]}/comments/'
+        )
+
+        page_data = client.get(url).json()
+        response = client.get(f'{url}?cursor=')
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{url}?cursor=` возвращает ответ '
+            'со статусом 200.'
+        )
+        cursor_data = response.json()
+        assert 'count' not in cursor_data and 'next' in cursor_data, (
+            f'Проверьте, что для эндпоинта `{url}` доступна пагинация по '
+            'курсору.'
+        )
+        assert cursor_data['results'] == page_data['results'], (
+            'Проверьте, что пагинация по курсору сохраняет порядок '
+            'комментариев.'
+        )
+
+    def test_08_comment_sparse_fields(self, client, populate_api):
+        ids = populate_api(3)
+        url = (
+            f'/api/v1/titles/{ids["title_id"]}/reviews/{ids["review_id"]}'
+            '/comments/?fields=id,author'
+        )
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        assert all(
+            set(comment) == {'id', 'author'}
+            for comment in response.json()['results']
+        ), (
+            f'Проверьте, что GET-запрос к `{url}` возвращает только поля '
+            'из параметра `fields`.'
+        )
+
+    def test_09_comment_conditional_get(self, client, user_client,
+                                        populate_api):
+        ids = populate_api(3)
+        url = (
+            f'/api/v1/titles/{ids["title_id"]}/reviews/{ids["review_id"]}'
+            '/comments/'
+        )
+
+        for api_client in (client, user_client):
+            response = api_client.get(url)
+            assert response.status_code == HTTPStatus.OK
+            etag = response['ETag']
+            response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+                f'Проверьте, что GET-запрос к `{url}` с актуальным `ETag` '
+                'возвращает ответ со статусом 304.'
+            )
+            assert not response.content
+
+        empty_url = url.replace(
+            f'/reviews/{ids["review_id"]}/', '/reviews/999999/'
+        )
+        assert client.get(empty_url).status_code == HTTPStatus.NOT_FOUND
@@ -0,0 +1,142 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import count_queries
+
+# Эндпоинт и допустимое число SQL-запросов для GET-запроса администратора.
+# Один запрос из бюджета уходит на получение пользователя по JWT,
+# ещё один - на счётчики изменений моделей для ETag.
+read_endpoints_budget = (
+    ('/api/v1/users/', 3),
+    ('/api/v1/users/{username}/', 2),
+    ('/api/v1/users/me/', 1),
+    ('/api/v1/titles/', 5),
+    ('/api/v1/titles/{title_id}/', 4),
+    ('/api/v1/titles/{title_id}/scores/', 3),
+    ('/api/v1/genres/', 4),
+    ('/api/v1/categories/', 4),
+    ('/api/v1/titles/{title_id}/reviews/', 4),
+    ('/api/v1/titles/{title_id}/reviews/?cursor=', 3),
+    ('/api/v1/titles/{title_id}/reviews/{review_id}/', 3),
+    ('/api/v1/titles/{title_id}/reviews/{review_id}/comments/', 4),
+    ('/api/v1/titles/{title_id}/reviews/{review_id}/comments/?cursor=', 3),
+    (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+        '{comment_id}/',
+        3
+    ),
+)
+# Пустой список вложенных объектов дополнительно проверяет родителя.
+NESTED_MISSING_PARENT_BUDGET = 5
+# Поиск родителя, проверка повторного отзыва, BEGIN, вставка отзыва,
+# пересчёт рейтинга с гистограммой оценок и счётчик изменений отзывов.
+REVIEW_CREATE_BUDGET = 9
+COMMENT_CREATE_BUDGET = 4
+# Поиск пользователя, затем в одной транзакции вставка нового
+# пользователя вместе с кодом (или обновление кода) и письмо в очередь.
+SIGNUP_BUDGET = 4
+SIGNUP_RESEND_BUDGET = 4
+TOKEN_BUDGET = 2
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08QueryBudget:
+
+    @pytest.mark.parametrize('url_template, budget', read_endpoints_budget)
+    def test_01_read_query_budget(self, admin_client, populate_api,
+                                  url_template, budget):
+        # Первый запрос загружает справочники жанров и категорий.
+        url = url_template.format(**populate_api(2))
+        admin_client.get(url)
+        response, small_count = count_queries(admin_client, url)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос администратора к `{url}` возвращает '
+            'ответ со статусом 200.'
+        )
+
+        url = url_template.format(**populate_api(12))
+        admin_client.get(url)
+        response, large_count = count_queries(admin_client, url)
+        assert response.status_code == HTTPStatus.OK
+        assert small_count == large_count, (
+            f'Число SQL-запросов для GET-запроса к `{url}` растёт вместе с '
+            f'количеством объектов: {small_count} -> {large_count}.'
+        )
+        assert large_count <= budget, (
+            f'GET-запрос к `{url}` выполняет {large_count} SQL-запросов, '
+            f'бюджет эндпоинта - {budget}.'
+        )
+
+    def test_02_auth_query_budget(self, client, populate_api):
+        populate_api(2)
+        url_signup = '/api/v1/auth/signup/'
+        url_token = '/api/v1/auth/token/'
+        data = {'username': 'budget_user', 'email': 'budget@yamdb.fake'}
+
+        for budget_name, url, budget in (
+            ('регистрация', url_signup, SIGNUP_BUDGET),
+            ('повторная отправка кода', url_signup, SIGNUP_RESEND_BUDGET),
+        ):
+            response, count = count_queries(client, url, 'post', data)
+            assert response.status_code == HTTPStatus.OK
+            assert count <= budget, (
+                f'POST-запрос к `{url}` ({budget_name}) выполняет {count} '
+                f'SQL-запросов, бюджет эндпоинта - {budget}.'
+            )
+
+        taken_email_data = {'username': 'other_user', 'email': data['email']}
+        response = client.post(url_signup, data=taken_email_data)
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert set(response.json()) == {'email'}, (
+            f'POST-запрос к `{url_signup}` с занятым `email` должен вернуть '
+            'ошибку только для поля `email`.'
+        )
+
+        token_data = {'username': data['username'], 'confirmation_code': '0'}
+        response, count = count_queries(client, url_token, 'post', token_data)
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert count <= TOKEN_BUDGET, (
+            f'POST-запрос к `{url_token}` выполняет {count} SQL-запросов, '
+            f'бюджет эндпоинта - {TOKEN_BUDGET}.'
+        )
+
+    @pytest.mark.parametrize('url_template', (
+        '/api/v1/titles/999/reviews/',
+        '/api/v1/titles/{title_id}/reviews/999/comments/',
+    ))
+    def test_03_nested_missing_parent_query_budget(self, admin_client,
+                                                   populate_api,
+                                                   url_template):
+        url = url_template.format(**populate_api(2))
+        response, count = count_queries(admin_client, url)
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            f'Проверьте, что GET-запрос к `{url}` для несуществующего '
+            'родительского объекта возвращает ответ со статусом 404.'
+        )
+        assert count <= NESTED_MISSING_PARENT_BUDGET, (
+            f'GET-запрос к `{url}` выполняет {count} SQL-запросов, '
+            f'бюджет эндпоинта - {NESTED_MISSING_PARENT_BUDGET}.'
+        )
+
+    def test_04_nested_create_query_budget(self, admin_client, populate_api):
+        ids = populate_api(2)
+        for url, data, budget in (
+            (
+                f'/api/v1/titles/{ids["title_id"]}/reviews/',
+                {'text': 'Отзыв администратора', 'score': 9},
+                REVIEW_CREATE_BUDGET,
+            ),
+            (
+                f'/api/v1/titles/{ids["title_id"]}/reviews/'
+                f'{ids["review_id"]}/comments/',
+                {'text': 'Комментарий администратора'},
+                COMMENT_CREATE_BUDGET,
+            ),
+        ):
+            response, count = count_queries(admin_client, url, 'post', data)
+            assert response.status_code == HTTPStatus.CREATED
+            assert count <= budget, (
+                f'POST-запрос к `{url}` выполняет {count} SQL-запросов, '
+                f'бюджет эндпоинта - {budget}.'
+            )
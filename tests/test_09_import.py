@@ -0,0 +1,228 @@
+import csv
+from graphlib import TopologicalSorter
+from io import StringIO
+from pathlib import Path
+
+import pytest
+from django.core.management import call_command
+
+DATA_DIR = Path(__file__).resolve().parent.parent / 'api_yamdb' / 'static' / 'data'
+
+# Порядок, в котором файлы зависят друг от друга по внешним ключам.
+DATASET = (
+    ('reviews.Genre', 'genre'),
+    ('reviews.Category', 'category'),
+    ('reviews.Title', 'titles'),
+    ('reviews.TitleGenre', 'genre_title'),
+    ('reviews.User', 'users'),
+    ('reviews.Review', 'review'),
+    ('reviews.Comment', 'comments'),
+)
+
+
+def count_rows(file_name):
+    with open(DATA_DIR / f'{file_name}.csv', encoding='utf-8') as csv_file:
+        return sum(1 for _ in csv.reader(csv_file)) - 1
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09Import:
+
+    def test_01_writecsv_bulk(self):
+        from django.apps import apps
+        from reviews.models import Title
+
+        for model_name, file_name in DATASET:
+            stdout = StringIO()
+            call_command(
+                'writecsv', model_name, file_name,
+                '--bulk', '--batch-size', '5', stdout=stdout,
+            )
+            output = stdout.getvalue()
+            assert 'успешно записаны' in output, output
+            assert 'строк/с' in output, (
+                'Команда `writecsv --bulk` должна сообщать скорость записи.'
+            )
+            assert apps.get_model(model_name).objects.count() == count_rows(
+                file_name
+            ), f'Не все строки `{file_name}.csv` записаны в {model_name}.'
+
+        title = Title.objects.get(id=1)
+        scores = list(title.reviews.values_list('score', flat=True))
+        assert title.rating_count == len(scores)
+        assert title.rating == sum(scores) / len(scores), (
+            'После `writecsv --bulk` рейтинг произведения должен '
+            'пересчитываться по записанным отзывам.'
+        )
+        assert sum(title.scores.values_list('count', flat=True)) == len(
+            scores
+        )
+
+    def test_02_importall(self):
+        from django.apps import apps
+        from reviews.models import Title
+
+        stdout = StringIO()
+        call_command('importall', '--batch-size', '7', stdout=stdout)
+        output = stdout.getvalue()
+        assert 'записано файлов: 7' in output, output
+        for model_name, file_name in DATASET:
+            assert apps.get_model(model_name).objects.count() == count_rows(
+                file_name
+            ), (
+                f'Команда `importall` должна записать все строки '
+                f'`{file_name}.csv` в {model_name}.'
+            )
+        title = Title.objects.get(id=1)
+        assert title.rating_count == title.reviews.count()
+
+    def test_03_importall_dependency_order(self):
+        from core.importer import find_model, get_dependencies
+
+        models = {
+            find_model(file_name): file_name for _, file_name in DATASET
+        }
+        assert all(models), 'Для каждого csv файла должна найтись модель.'
+        order = [
+            models[model] for model in TopologicalSorter(
+                {model: get_dependencies(model, models) for model in models}
+            ).static_order()
+        ]
+        for before, after in (
+            ('category', 'titles'),
+            ('titles', 'genre_title'),
+            ('genre', 'genre_title'),
+            ('titles', 'review'),
+            ('users', 'review'),
+            ('review', 'comments'),
+        ):
+            assert order.index(before) < order.index(after), order
+
+    def test_04_writecsv_upsert(self, tmp_path, monkeypatch,
+                                django_assert_max_num_queries):
+        from reviews.models import Genre
+
+        monkeypatch.setattr(
+            'core.management.commands.writecsv.DATA_PATH', tmp_path
+        )
+
+        def write_genres(rows):
+            with open(tmp_path / 'genre.csv', 'w', encoding='utf-8') as file:
+                writer = csv.writer(file)
+                writer.writerow(('id', 'name', 'slug'))
+                writer.writerows(rows)
+
+        def upsert(*args):
+            stdout = StringIO()
+            call_command(
+                'writecsv', 'reviews.Genre', 'genre', '--upsert',
+                '--batch-size', '10', *args, stdout=stdout,
+            )
+            return stdout.getvalue()
+
+        rows = [(idx, f'Жанр {idx}', f'genre-{idx}') for idx in range(1, 26)]
+        write_genres(rows)
+        with django_assert_max_num_queries(20):
+            output = upsert()
+        assert 'Добавлено: 25, обновлено: 0, без изменений: 0' in output, (
+            output
+        )
+
+        rows[0] = (1, 'Новое имя', 'genre-1')
+        rows.append((26, 'Жанр 26', 'genre-26'))
+        write_genres(rows)
+        with django_assert_max_num_queries(20):
+            output = upsert()
+        assert 'Добавлено: 1, обновлено: 1, без изменений: 24' in output, (
+            'Повторный запуск `writecsv --upsert` должен добавить только '
+            'новые строки и обновить только изменённые.'
+        )
+        assert Genre.objects.get(id=1).name == 'Новое имя'
+        assert Genre.objects.count() == 26
+
+        write_genres([(100, 'Переименованный', 'genre-2')])
+        output = upsert('--key', 'slug')
+        assert 'Добавлено: 0, обновлено: 1, без изменений: 0' in output, (
+            'С `--key slug` строка должна находиться по slug.'
+        )
+        genre = Genre.objects.get(slug='genre-2')
+        assert (genre.id, genre.name) == (2, 'Переименованный'), (
+            'Первичный ключ не должен меняться при поиске по `--key`.'
+        )
+
+    @pytest.mark.parametrize('export_args, extension', (
+        ((), '.csv'),
+        (('--format', 'ndjson', '--gzip'), '.ndjson.gz'),
+    ))
+    def test_05_exportdata_round_trip(self, tmp_path, monkeypatch,
+                                      export_args, extension):
+        from django.apps import apps
+
+        call_command('importall', stdout=StringIO())
+        counts = {
+            model_name: apps.get_model(model_name).objects.count()
+            for model_name, _ in DATASET
+        }
+        stdout = StringIO()
+        call_command(
+            'exportdata', '--output-dir', str(tmp_path),
+            '--chunk-size', '10', *export_args, stdout=stdout,
+        )
+        assert 'выгружено строк' in stdout.getvalue()
+
+        call_command('flush', '--no-input')
+        monkeypatch.setattr(
+            'core.management.commands.writecsv.DATA_PATH', tmp_path
+        )
+        for model_name, _ in DATASET:
+            model = apps.get_model(model_name)
+            file_name = model._meta.model_name + extension
+            assert (tmp_path / file_name).exists(), (
+                f'Команда `exportdata` должна создать файл {file_name}.'
+            )
+            call_command(
+                'writecsv', model_name, file_name, '--bulk',
+                stdout=StringIO(),
+            )
+            assert model.objects.count() == counts[model_name], (
+                f'Файл {file_name} из `exportdata` должен читаться '
+                '`writecsv` без потерь.'
+            )
+
+    def test_06_read_ahead_is_bounded(self):
+        import threading
+        import time
+        from concurrent.futures import ThreadPoolExecutor
+
+        from core.importer import read_ahead
+
+        produced = []
+
+        def batches():
+            for idx in range(100):
+                produced.append(idx)
+                yield [idx]
+
+        stop = threading.Event()
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            reader = read_ahead(executor, batches(), stop, lookahead=2)
+            assert next(reader) == [0]
+            time.sleep(0.3)
+            assert len(produced) <= 4, (
+                'Разбор файла не должен забегать вперёд записи больше чем '
+                'на несколько пачек.'
+            )
+            assert list(reader) == [[idx] for idx in range(1, 100)]
+
+            reader = read_ahead(executor, batches(), stop, lookahead=2)
+            stop.set()
+        assert len(produced) <= 100 + 4
+
+        def broken():
+            yield [1]
+            raise ValueError('битая строка')
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            reader = read_ahead(executor, broken(), threading.Event())
+            with pytest.raises(ValueError):
+                list(reader)
@@ -0,0 +1,81 @@
+import datetime
+import decimal
+import io
+import uuid
+
+import pytest
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.serializer_helpers import ReturnDict, ReturnList
+
+SAMPLE_DATA = ReturnDict(
+    {
+        'id': 1,
+        'name': 'Побег из Шоушенка',
+        'rating': 9.5,
+        'description': 'Строка\u2028с\u2029разделителями и "кавычками"',
+        'genre': ReturnList(
+            [{'name': 'Драма', 'slug': 'drama'}], serializer=None
+        ),
+        'category': None,
+        'pub_date': datetime.datetime(
+            2019, 9, 24, 21, 8, 21, 567123, tzinfo=datetime.timezone.utc
+        ),
+        'date': datetime.date(2019, 9, 24),
+        'price': decimal.Decimal('1.50'),
+        'uuid': uuid.UUID('12345678123456781234567812345678'),
+        'lazy': gettext_lazy('Отзыв'),
+        1: 'ключ не строкой',
+    },
+    serializer=None,
+)
+
+
+def test_01_fast_renderer_matches_json_renderer():
+    from api.renderers import FastJSONRenderer
+
+    expected = JSONRenderer().render(SAMPLE_DATA)
+    assert FastJSONRenderer().render(SAMPLE_DATA) == expected, (
+        'FastJSONRenderer должен выводить те же байты, что JSONRenderer.'
+    )
+    small = {key: SAMPLE_DATA[key] for key in ('id', 'name', 'pub_date')}
+    big = {'big': 2 ** 70}
+    assert FastJSONRenderer().render(big) == JSONRenderer().render(big)
+    assert FastJSONRenderer().render(None) == b''
+    assert FastJSONRenderer().render(
+        small, 'application/json; indent=4'
+    ) == JSONRenderer().render(small, 'application/json; indent=4')
+
+
+def test_02_fast_parser_matches_json_parser():
+    from api.parsers import FastJSONParser
+
+    body = JSONRenderer().render({'name': 'Жанр', 'ids': [1, 2], 'x': None})
+    assert FastJSONParser().parse(io.BytesIO(body)) == JSONParser().parse(
+        io.BytesIO(body)
+    )
+    for invalid_body in (b'{"name": ', b'NaN'):
+        with pytest.raises(ParseError):
+            FastJSONParser().parse(io.BytesIO(invalid_body))
+
+
+def test_03_fast_renderer_floats():
+    import json
+
+    from api.renderers import FastJSONRenderer
+
+    plain = {'rating': 7.5, 'third': 1 / 3, 'small': 0.0001, 'big': 1e15}
+    assert FastJSONRenderer().render(plain) == JSONRenderer().render(plain), (
+        'Обычные дробные числа FastJSONRenderer должен выводить так же, '
+        'как JSONRenderer.'
+    )
+    exponent = {'big': 1e16, 'small': 1e-7}
+    assert FastJSONRenderer().render(exponent) == b'{"big":1e16,"small":1e-7}'
+    assert json.loads(FastJSONRenderer().render(exponent)) == json.loads(
+        JSONRenderer().render(exponent)
+    ), (
+        'Числа в экспоненциальной записи могут выглядеть иначе, но должны '
+        'разбираться в те же значения.'
+    )
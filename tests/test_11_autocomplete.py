@@ -0,0 +1,117 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_categories, create_genre
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11Autocomplete:
+    url = '/api/v1/autocomplete/'
+
+    def test_01_autocomplete(self, client, admin_client):
+        genres = create_genre(admin_client)
+        categories = create_categories(admin_client)
+        response = admin_client.post('/api/v1/titles/bulk/', data=[
+            {
+                'name': name,
+                'year': 2000,
+                'genre': [genres[0]['slug']],
+                'category': categories[0]['slug'],
+            }
+            for name in ('Драмкружок', 'Ёжик в тумане', 'Большая драма')
+        ], format='json')
+        assert response.status_code == HTTPStatus.CREATED
+
+        response = client.get(f'{self.url}?q=дра')
+        assert response.status_code == HTTPStatus.OK, (
+            f'Эндпоинт `{self.url}` должен быть доступен без токена.'
+        )
+        data = response.json()
+        assert data['genres'] == [{'name': 'Драма', 'slug': 'drama'}]
+        assert data['categories'] == []
+        assert [title['name'] for title in data['titles']] == [
+            'Драмкружок', 'Большая драма'
+        ], (
+            f'Проверьте, что `{self.url}` ищет по началу слов названия и '
+            'выдаёт первыми совпадения с начала названия.'
+        )
+        assert set(data['titles'][0]) == {'id', 'name'}
+
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(f'{self.url}?q=Ежик В&limit=1')
+        assert not context.captured_queries, (
+            f'Подсказки `{self.url}` должны браться из памяти процесса.'
+        )
+        assert [title['name'] for title in response.json()['titles']] == [
+            'Ёжик в тумане'
+        ]
+        assert len(client.get(f'{self.url}?q=д&limit=1').json()['titles']) == 1
+
+        title_id = data['titles'][0]['id']
+        admin_client.patch(
+            f'/api/v1/titles/{title_id}/', data={'name': 'Кружок'}
+        )
+        admin_client.post(
+            '/api/v1/genres/', data={'name': 'Дракон-фэнтези', 'slug': 'dragon'}
+        )
+        admin_client.delete('/api/v1/genres/drama/')
+        with CaptureQueriesContext(connection) as context:
+            data = client.get(f'{self.url}?q=дра').json()
+            kruzhok = client.get(f'{self.url}?q=круж').json()
+        assert not context.captured_queries, (
+            'Индексы подсказок должны обновляться сигналами сохранения и '
+            'удаления, а не перечитываться из базы.'
+        )
+        assert [genre['slug'] for genre in data['genres']] == ['dragon']
+        assert [title['name'] for title in data['titles']] == [
+            'Большая драма'
+        ]
+        assert [title['name'] for title in kruzhok['titles']] == ['Кружок']
+
+        for query in ('?q=дра&limit=0', '?q=дра&limit=x', '?q=дра&limit=51'):
+            response = client.get(self.url + query)
+            assert response.status_code == HTTPStatus.BAD_REQUEST
+            assert 'limit' in response.json()
+        assert client.get(f'{self.url}?q=').json()['titles'] == []
+
+    def test_02_autocomplete_reload_on_version(self, client, admin_client,
+                                               settings):
+        from reviews.models import Title
+        from reviews.signals import bump_version
+
+        genres = create_genre(admin_client)
+        categories = create_categories(admin_client)
+        admin_client.post('/api/v1/titles/bulk/', data=[
+            {
+                'name': name,
+                'year': 2000,
+                'genre': [genres[0]['slug']],
+                'category': categories[0]['slug'],
+            }
+            for name in ('Тихий Дон', 'Тихая ночь')
+        ], format='json')
+        assert len(client.get(f'{self.url}?q=тих').json()['titles']) == 2
+
+        settings.AUTOCOMPLETE_TIMEOUT = 0
+        with CaptureQueriesContext(connection) as context:
+            data = client.get(f'{self.url}?q=тихий д').json()
+        assert [title['name'] for title in data['titles']] == ['Тихий Дон']
+        sql = ' '.join(query['sql'] for query in context.captured_queries)
+        assert 'reviews_title' not in sql and 'reviews_genre' not in sql, (
+            'Пока модели не менялись, индексы подсказок должны сверять '
+            'только версию модели, а не перечитывать названия.'
+        )
+
+        # Изменение в обход сигналов, как из другого процесса.
+        Title.objects.filter(name='Тихая ночь').update(name='Тихий омут')
+        bump_version(Title)
+        data = client.get(f'{self.url}?q=тихий').json()
+        assert [title['name'] for title in data['titles']] == [
+            'Тихий Дон', 'Тихий омут'
+        ], (
+            'Проверьте, что индекс подсказок перечитывается после '
+            'изменения версии модели.'
+        )
@@ -1,5 +1,8 @@
 from http import HTTPStatus
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
 
 check_name_and_slug_patterns = (
     (
@@ -305,3 +308,9 @@ def check_fields(obj_type, url_pattern, obj, expected_data, detail=False):
         f'данные {obj_types[obj_type]}{results_in_msg}. Поле `id` не '
         'найдено или не является целым числом.'
     )
+
+
+def count_queries(client, url, method='get', data=None):
+    with CaptureQueriesContext(connection) as context:
+        response = getattr(client, method)(url, data=data)
+    return response, len(context.captured_queries)